@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+import threading
+import numpy as np
+
+class CaptureBuffer:
+    """Growable preallocated int16 sample buffer for microphone capture
+
+    Chunks are written straight into one contiguous array that grows by half
+    again when full, instead of keeping a list of small bytes objects that
+    has to be joined (and so held twice) at the end of every recording.
+    """
+
+    def __init__(self, initial_seconds=30, sample_rate=16000, dtype=np.int16):
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self._initial_capacity = int(initial_seconds * sample_rate)
+        self._data = np.empty(self._initial_capacity, dtype=self.dtype)
+        self._length = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    @property
+    def seconds(self):
+        return self._length / self.sample_rate
+
+    def _grow(self, needed):
+        capacity = len(self._data)
+        while capacity < needed:
+            # 1.5x keeps growth amortized O(1) with less slack than doubling
+            capacity += capacity // 2
+        grown = np.empty(capacity, dtype=self.dtype)
+        grown[:self._length] = self._data[:self._length]
+        # Views handed out earlier keep the old array alive and stay valid
+        self._data = grown
+
+    def append(self, data):
+        """Append a chunk of raw PCM bytes or an array of samples"""
+        if isinstance(data, np.ndarray):
+            samples = data.astype(self.dtype, copy=False).reshape(-1)
+        else:
+            # Zero-copy view over PyAudio's bytes; the only copy is into _data
+            samples = np.frombuffer(data, dtype=self.dtype)
+        with self._lock:
+            end = self._length + len(samples)
+            if end > len(self._data):
+                self._grow(end)
+            self._data[self._length:end] = samples
+            self._length = end
+
+    def view(self, start=0, end=None):
+        """Read-only view of captured samples, no copy"""
+        with self._lock:
+            end = self._length if end is None else min(end, self._length)
+            view = self._data[start:end]
+        view.flags.writeable = False
+        return view
+
+    def to_float32(self, start=0, end=None):
+        """Captured samples scaled to [-1, 1) float32, as Whisper expects"""
+        audio = self.view(start, end).astype(np.float32)
+        audio *= 1.0 / 32768.0
+        return audio
+
+    def clear(self):
+        """Start a new recording, keeping the allocation unless it grew a lot"""
+        with self._lock:
+            self._length = 0
+            if len(self._data) > 4 * self._initial_capacity:
+                self._data = np.empty(self._initial_capacity, dtype=self.dtype)
+
+class RingBuffer:
+    """Fixed-size buffer that keeps only the most recent samples"""
+
+    def __init__(self, seconds=0.5, sample_rate=16000, dtype=np.int16):
+        self.sample_rate = sample_rate
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(max(1, int(seconds * sample_rate)), dtype=self.dtype)
+        self._pos = 0
+        self._filled = 0
+
+    def __len__(self):
+        return self._filled
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def write(self, data):
+        """Write raw PCM bytes or samples, overwriting the oldest"""
+        if isinstance(data, np.ndarray):
+            samples = data.astype(self.dtype, copy=False).reshape(-1)
+        else:
+            samples = np.frombuffer(data, dtype=self.dtype)
+        size = len(self._data)
+        if len(samples) >= size:
+            self._data[:] = samples[-size:]
+            self._pos = 0
+            self._filled = size
+            return
+        end = self._pos + len(samples)
+        if end <= size:
+            self._data[self._pos:end] = samples
+        else:
+            split = size - self._pos
+            self._data[self._pos:] = samples[:split]
+            self._data[:end - size] = samples[split:]
+        self._pos = end % size
+        self._filled = min(size, self._filled + len(samples))
+
+    def snapshot(self):
+        """Copy of the buffered samples, oldest first"""
+        if self._filled < len(self._data):
+            return self._data[self._pos - self._filled:self._pos].copy()
+        return np.concatenate((self._data[self._pos:], self._data[:self._pos]))
+
+    def clear(self):
+        self._pos = 0
+        self._filled = 0
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# Finds the fastest torch thread counts for this machine, per model size.
+#
+#   python -m autotune --models tiny base small
+#   python -m autotune --models base --clip sample.wav --repeat 3
+#
+# Each candidate inter-op count runs in a fresh process (torch fixes it at the
+# first parallel op) and sweeps the intra-op counts. The winners are stored in
+# ~/.whisper_app/thread_tuning.json and applied by the desktop app at load.
+
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Within this margin of the fastest, fewer threads wins: the spare cores go
+# to the UI, audio capture and hotkey threads
+TIE_MARGIN = 0.03
+
+def candidate_thread_counts():
+    from transcription import physical_cores
+    logical = os.cpu_count() or 1
+    physical = physical_cores()
+    counts = {1, physical, max(1, physical - 1), logical}
+    n = 2
+    while n < logical:
+        counts.add(n)
+        n *= 2
+    return sorted(counts)
+
+def reference_clip(path=None, seconds=10.0):
+    import numpy as np
+    from transcription import load_audio_file
+    if path:
+        return load_audio_file(path)
+    # Quiet noise keeps the decoder off the no-speech shortcut, like the warm-up
+    rng = np.random.default_rng(0)
+    return (rng.standard_normal(int(16000 * seconds)) * 1e-3).astype(np.float32)
+
+def _time_thread_counts(model_size, inter, intra_counts, clip_path, repeat):
+    """Best-of-repeat seconds per intra-op count; runs in a fresh process"""
+    import torch
+    from transcription import ModelCache
+
+    # Keep stdout for the report; model loading chatter goes to stderr
+    sys.stdout = sys.stderr
+    torch.set_num_interop_threads(inter)
+    clip = reference_clip(clip_path)
+    entry = ModelCache(budget_mb=1 << 20).get(model_size, "cpu")
+    # Greedy decoding without fallbacks does the same work at every thread count
+    options = dict(temperature=0.0, condition_on_previous_text=False,
+                   compression_ratio_threshold=None, logprob_threshold=None, no_speech_threshold=None)
+
+    timings = {}
+    for intra in intra_counts:
+        torch.set_num_threads(intra)
+        entry.backend.transcribe(entry, clip[:16000], **options)  # warm-up at this count
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            entry.backend.transcribe(entry, clip, **options)
+            best = min(best, time.perf_counter() - start)
+        timings[intra] = best
+        print(f"  {model_size}: intra={intra} inter={inter}: {best:.2f}s")
+    return timings
+
+def pick_best(timings):
+    """(intra, inter) with the fewest total threads within TIE_MARGIN of the fastest"""
+    fastest = min(timings.values())
+    close = [key for key, seconds in timings.items() if seconds <= fastest * (1 + TIE_MARGIN)]
+    return min(close, key=lambda key: (key[0] + key[1], timings[key]))
+
+def autotune(models, clip_path=None, inter_counts=(1, 2), intra_counts=None, repeat=2):
+    """Time every thread combination per model; returns the settings to store"""
+    intra_counts = intra_counts or candidate_thread_counts()
+    context = multiprocessing.get_context("spawn")
+    results = {}
+    for model_size in models:
+        timings = {}
+        for inter in inter_counts:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                measured = pool.submit(_time_thread_counts, model_size, inter, intra_counts,
+                                       clip_path, repeat).result()
+            timings.update({(intra, inter): seconds for intra, seconds in measured.items()})
+        intra, inter = pick_best(timings)
+        results[model_size] = {
+            "intra_op_threads": intra,
+            "inter_op_threads": inter,
+            "seconds": round(timings[(intra, inter)], 3),
+            "max_threads_seconds": round(timings.get((max(intra_counts), 1), float("nan")), 3),
+        }
+    return results
+
+def main(argv=None):
+    from transcription import MODELS, DEFAULT_MODEL, save_thread_tuning
+
+    parser = argparse.ArgumentParser(description="Tune torch CPU thread counts per Whisper model")
+    parser.add_argument("--models", nargs="+", default=[DEFAULT_MODEL], choices=list(MODELS))
+    parser.add_argument("--clip", help="reference audio (default: 10s of synthetic noise)")
+    parser.add_argument("--intra", type=int, nargs="+", help="intra-op counts to try")
+    parser.add_argument("--inter", type=int, nargs="+", default=[1, 2], help="inter-op counts to try")
+    parser.add_argument("--repeat", type=int, default=2, help="timed runs per combination (best is kept)")
+    parser.add_argument("--dry-run", action="store_true", help="report without saving")
+    args = parser.parse_args(argv)
+
+    results = autotune(args.models, args.clip, args.inter, args.intra, args.repeat)
+    for model_size, best in results.items():
+        print(f"{model_size}: intra={best['intra_op_threads']} inter={best['inter_op_threads']} "
+              f"{best['seconds']:.2f}s (max threads: {best['max_threads_seconds']:.2f}s)")
+    if not args.dry_run:
+        path = save_thread_tuning({model_size: {k: best[k] for k in ("intra_op_threads", "inter_op_threads")}
+                                   for model_size, best in results.items()})
+        print(f"Saved to {path}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
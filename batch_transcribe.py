@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+
+# Headless batch transcription of recorded files.
+#
+#   python -m batch_transcribe meetings/ --model small --workers 4 --format srt --output-dir out/
+#   python -m batch_transcribe lecture.mp3 --chunked --workers 4 --format srt
+#
+# Each worker process loads its model once and keeps it resident; results are
+# written as soon as each file finishes, in completion order. With --chunked,
+# each file is split at pauses and its chunks are spread over the workers, so
+# one long recording uses every worker.
+
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from collections import Counter
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+AUDIO_EXTENSIONS = {
+    ".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".webm",
+    ".mp4", ".mkv", ".mov", ".aac", ".wma"
+}
+FORMATS = ("txt", "jsonl", "srt", "vtt")
+# Target chunk length for --chunked; cuts land on the nearest pause
+CHUNK_SECONDS = 60.0
+
+_worker_model = None
+
+def find_audio_files(inputs, recursive=True):
+    """Expand files and directories into a sorted list of audio files"""
+    files = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            pattern = "**/*" if recursive else "*"
+            files.extend(sorted(p for p in path.glob(pattern)
+                                if p.is_file() and p.suffix.lower() in AUDIO_EXTENSIONS))
+        elif path.is_file():
+            files.append(path)
+        else:
+            print(f"Warning: skipping {item}: not found", file=sys.stderr)
+    return files
+
+def format_timestamp(seconds, separator="."):
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{separator}{millis:03d}"
+
+def to_srt(segments):
+    blocks = []
+    for i, segment in enumerate(segments, start=1):
+        start = format_timestamp(segment["start"], ",")
+        end = format_timestamp(segment["end"], ",")
+        blocks.append(f"{i}\n{start} --> {end}\n{segment['text'].strip()}\n")
+    return "\n".join(blocks)
+
+def to_vtt(segments):
+    blocks = ["WEBVTT\n"]
+    for segment in segments:
+        start = format_timestamp(segment["start"])
+        end = format_timestamp(segment["end"])
+        blocks.append(f"{start} --> {end}\n{segment['text'].strip()}\n")
+    return "\n".join(blocks)
+
+def render(record, fmt):
+    if fmt == "jsonl":
+        return json.dumps(record, ensure_ascii=False) + "\n"
+    if fmt == "srt":
+        return to_srt(record["segments"])
+    if fmt == "vtt":
+        return to_vtt(record["segments"])
+    return record["text"] + "\n"
+
+def _init_worker(model_size, threads):
+    """Process pool initializer: load the model once per worker"""
+    global _worker_model
+    import torch
+    from transcription import get_model_cache, get_language_policy
+
+    # Keep stdout for results; model loading chatter goes to stderr
+    sys.stdout = sys.stderr
+    # Split the cores between workers instead of every worker using all of them
+    torch.set_num_threads(threads)
+    _worker_model = model_size
+    get_model_cache().get(get_language_policy().route(model_size)[0])
+
+def _worker_ready(delay):
+    # Holds the worker briefly so each warm-up task lands on a different process
+    time.sleep(delay)
+    return os.getpid()
+
+def make_pool(model_size, workers):
+    """A spawn process pool whose workers each keep model_size resident"""
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    context = multiprocessing.get_context("spawn")
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                               initializer=_init_worker, initargs=(model_size, threads))
+
+def warm_pool(pool, workers, attempts=10):
+    """Block until every worker process has started and loaded its model"""
+    seen = set()
+    for _ in range(attempts):
+        seen.update(pool.map(_worker_ready, [0.2] * workers))
+        if len(seen) >= workers:
+            break
+    return len(seen)
+
+def _route(options):
+    """(checkpoint, options) per language_mode/language, as in the desktop app"""
+    from transcription import get_language_policy, model_for_language
+
+    if options.get("language"):
+        return model_for_language(_worker_model, options["language"]), options
+    checkpoint, language = get_language_policy().route(_worker_model)
+    return checkpoint, {**options, "language": language}
+
+def _transcribe(audio, options):
+    from transcription import get_language_policy, transcribe_audio
+
+    checkpoint, options = _route(options)
+    result = transcribe_audio(audio, checkpoint, **options)
+    if options["language"] is None:
+        get_language_policy().observe(result.get("language"))
+    return result
+
+def _transcribe_file(path, options):
+    from transcription import load_audio_file
+
+    start = time.perf_counter()
+    audio = load_audio_file(path)
+    result = _transcribe(audio, options)
+    return {
+        "file": str(path),
+        "duration": round(len(audio) / 16000, 3),
+        "model": _worker_model,
+        "language": result.get("language"),
+        "text": result["text"].strip(),
+        "segments": [
+            {"start": s["start"], "end": s["end"], "text": s["text"]}
+            for s in result["segments"]
+        ],
+        "elapsed": round(time.perf_counter() - start, 3),
+    }
+
+def _transcribe_chunk(index, audio, offset, options):
+    """Transcribe one chunk; timestamps are moved to the whole file's timeline"""
+    result = _transcribe(audio, options)
+    segments = [
+        {"start": round(s["start"] + offset, 3), "end": round(s["end"] + offset, 3), "text": s["text"]}
+        for s in result["segments"]
+    ]
+    return index, result.get("language"), segments
+
+def transcribe_chunked(pool, audio, options=None, chunk_seconds=CHUNK_SECONDS):
+    """Split audio at pauses, transcribe the chunks across pool and merge them in order"""
+    from vad import split_at_pauses
+
+    options = options or {}
+    chunks = split_at_pauses(audio, 16000, target_s=chunk_seconds,
+                             max_s=chunk_seconds * 1.5, min_s=chunk_seconds / 3)
+    futures = [pool.submit(_transcribe_chunk, i, audio[start:end], start / 16000, options)
+               for i, (start, end) in enumerate(chunks)]
+    results = sorted((future.result() for future in futures), key=lambda r: r[0])
+    segments = [segment for _, _, chunk_segments in results for segment in chunk_segments]
+    languages = Counter(language for _, language, _ in results if language)
+    return {
+        "language": languages.most_common(1)[0][0] if languages else None,
+        "text": "".join(s["text"] for s in segments).strip(),
+        "segments": segments,
+        "chunks": len(chunks),
+    }
+
+def run_chunked(files, model_size, workers, writer, options=None, chunk_seconds=CHUNK_SECONDS):
+    """Transcribe files one at a time, each split into chunks across the pool"""
+    from transcription import load_audio_file
+
+    failures = 0
+    with make_pool(model_size, workers) as pool:
+        for done, path in enumerate(files, start=1):
+            start = time.perf_counter()
+            try:
+                audio = load_audio_file(path)
+                record = transcribe_chunked(pool, audio, options, chunk_seconds)
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(files)}] ❌ {path}: {e}", file=sys.stderr)
+                continue
+            record = {"file": str(path), "duration": round(len(audio) / 16000, 3), "model": model_size,
+                      **record, "elapsed": round(time.perf_counter() - start, 3)}
+            writer.write(record)
+            print(f"[{done}/{len(files)}] ✅ {path} ({record['chunks']} chunks, {record['elapsed']:.1f}s)",
+                  file=sys.stderr)
+    return failures
+
+class OutputWriter:
+    """Writes each finished record to stdout or to files in an output dir
+
+    Files are laid out under output_dir by their path relative to base, so
+    inputs with the same name in different directories don't overwrite
+    each other.
+    """
+
+    def __init__(self, fmt, output_dir=None, base=None):
+        self.fmt = fmt
+        self.output_dir = Path(output_dir) if output_dir else None
+        self.base = Path(base).resolve() if base else None
+        self._written = set()
+        self._jsonl = None
+        if self.output_dir:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+            if fmt == "jsonl":
+                self._jsonl = open(self.output_dir / "transcripts.jsonl", "a", encoding="utf-8")
+
+    def write(self, record):
+        text = render(record, self.fmt)
+        if self._jsonl:
+            self._jsonl.write(text)
+            self._jsonl.flush()
+        elif self.output_dir:
+            target = self._target(Path(record["file"]))
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text(text, encoding="utf-8")
+        else:
+            if self.fmt != "jsonl":
+                sys.stdout.write(f"==> {record['file']} <==\n")
+            sys.stdout.write(text)
+            sys.stdout.flush()
+
+    def _target(self, path):
+        path = path.resolve()
+        try:
+            relative = path.relative_to(self.base) if self.base else Path(path.name)
+        except ValueError:
+            relative = Path(path.name)
+        target = self.output_dir / relative.with_suffix("." + self.fmt)
+        if target in self._written:
+            # talk.mp3 and talk.wav side by side: keep the input's extension too
+            target = self.output_dir / relative.with_name(relative.name + "." + self.fmt)
+        self._written.add(target)
+        return target
+
+    def close(self):
+        if self._jsonl:
+            self._jsonl.close()
+
+def run_batch(files, model_size, workers, writer, options=None):
+    """Transcribe files across a process pool, writing results as they finish"""
+    options = options or {}
+    failures = 0
+
+    with make_pool(model_size, workers) as pool:
+        futures = {pool.submit(_transcribe_file, path, options): path for path in files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            path = futures[future]
+            try:
+                record = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(files)}] ❌ {path}: {e}", file=sys.stderr)
+                continue
+            writer.write(record)
+            print(f"[{done}/{len(files)}] ✅ {path} ({record['elapsed']:.1f}s)", file=sys.stderr)
+    return failures
+
+def main(argv=None):
+    from transcription import MODELS, DEFAULT_MODEL, DECODING_PROFILES
+
+    parser = argparse.ArgumentParser(description="Transcribe audio files with local Whisper models")
+    parser.add_argument("inputs", nargs="+", help="audio files or directories")
+    parser.add_argument("--model", default=DEFAULT_MODEL, choices=list(MODELS))
+    parser.add_argument("--workers", type=int, default=max(1, min(4, (os.cpu_count() or 2) // 2)),
+                        help="worker processes, each holding one resident model")
+    parser.add_argument("--format", default="txt", choices=FORMATS)
+    parser.add_argument("--output-dir", help="write per-file outputs here instead of stdout")
+    parser.add_argument("--no-recursive", action="store_true", help="don't descend into subdirectories")
+    parser.add_argument("--profile", choices=list(DECODING_PROFILES),
+                        help="decoding profile (default: the decoding_profile setting)")
+    parser.add_argument("--chunked", action="store_true",
+                        help="split each file at pauses and spread its chunks over the workers")
+    parser.add_argument("--chunk-seconds", type=float, default=CHUNK_SECONDS,
+                        help="target chunk length with --chunked")
+    args = parser.parse_args(argv)
+
+    files = find_audio_files(args.inputs, recursive=not args.no_recursive)
+    if not files:
+        print("No audio files found", file=sys.stderr)
+        return 1
+
+    workers = max(1, args.workers if args.chunked else min(args.workers, len(files)))
+    print(f"Transcribing {len(files)} files with {args.model} on {workers} workers", file=sys.stderr)
+    # Mirror the inputs' layout below their deepest common directory
+    base = os.path.commonpath([str(Path(f).resolve().parent) for f in files])
+    writer = OutputWriter(args.format, args.output_dir, base)
+    options = {"profile": args.profile} if args.profile else {}
+    try:
+        if args.chunked:
+            failures = run_chunked(files, args.model, workers, writer, options, args.chunk_seconds)
+        else:
+            failures = run_batch(files, args.model, workers, writer, options)
+    finally:
+        writer.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
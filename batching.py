@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+# Dynamic micro-batching for the transcription server. Requests that arrive
+# within a short window are grouped, their log-mel spectrograms computed in
+# one batched STFT, and encoded and decoded together by whisper.decode.
+
+import time
+import queue
+
+import torch
+import whisper
+from whisper.audio import N_FFT, HOP_LENGTH, N_SAMPLES, SAMPLE_RATE, mel_filters
+
+from result_cache import get_result_cache
+from transcription import WhisperBackend, decoding_options, get_model_cache, transcribe_audio
+
+# Same quality gates model.transcribe uses to decide on a fallback decode
+COMPRESSION_RATIO_THRESHOLD = 2.4
+LOGPROB_THRESHOLD = -1.0
+NO_SPEECH_THRESHOLD = 0.6
+
+def collect_batch(jobs, max_batch=8, max_wait=0.05):
+    """Block for one job, then gather more for up to max_wait seconds"""
+    batch = [jobs.get()]
+    deadline = time.perf_counter() + max_wait
+    while len(batch) < max_batch:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(jobs.get(timeout=remaining))
+        except queue.Empty:
+            break
+    return batch
+
+def batched_log_mel(clips, n_mels=80, device="cpu"):
+    """Log-mel spectrograms of up-to-30s clips as one (batch, n_mels, 3000) tensor
+
+    Matches whisper.log_mel_spectrogram(pad_or_trim(clip)) per clip, including
+    the per-clip dynamic range clamp, but runs a single batched STFT.
+    """
+    audio = torch.stack([whisper.pad_or_trim(torch.as_tensor(clip, dtype=torch.float32))
+                         for clip in clips]).to(device)
+    window = torch.hann_window(N_FFT).to(device)
+    stft = torch.stft(audio, N_FFT, HOP_LENGTH, window=window, return_complex=True)
+    magnitudes = stft[..., :-1].abs() ** 2
+    mel_spec = mel_filters(device, n_mels) @ magnitudes
+    log_spec = torch.clamp(mel_spec, min=1e-10).log10()
+    log_spec = torch.maximum(log_spec, log_spec.amax(dim=(1, 2), keepdim=True) - 8.0)
+    return (log_spec + 4.0) / 4.0
+
+def _needs_fallback(result):
+    if result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD:
+        return False  # silence; reported as empty text
+    return (result.compression_ratio > COMPRESSION_RATIO_THRESHOLD
+            or result.avg_logprob < LOGPROB_THRESHOLD)
+
+def transcribe_batch(clips, model_size, cache=None, language=None, fallback=True,
+                     use_result_cache=True):
+    """Transcribe several clips with one encoder pass and one batched decode
+
+    Clips longer than 30 s, and clips whose greedy batched decode fails the
+    usual quality gates, go through model.transcribe one at a time so results
+    match the unbatched path.
+    """
+    cache = cache or get_model_cache()
+    results = [None] * len(clips)
+
+    # Clips seen before come from the result cache, under either the
+    # one-at-a-time key or the batched decode's own key
+    result_cache = get_result_cache() if use_result_cache else None
+    keys = [None] * len(clips)
+    if result_cache:
+        model_key = cache.key_for(model_size)
+        for i, clip in enumerate(clips):
+            single = result_cache.key(clip, model_key, decoding_options(language=language))
+            keys[i] = result_cache.key(clip, model_key, {"language": language, "batched_decode": True})
+            results[i] = result_cache.get(single) or result_cache.get(keys[i])
+
+    short = [i for i, clip in enumerate(clips) if len(clip) <= N_SAMPLES and results[i] is None]
+    # Similar durations tend to produce similar token counts, so the batch
+    # doesn't keep decoding for one long straggler
+    short.sort(key=lambda i: len(clips[i]))
+
+    decoded = []
+    if short:
+        with cache.use(model_size) as entry:
+            # The batched decode drives openai-whisper's model directly; other
+            # backends take the one-at-a-time path below
+            if isinstance(entry.backend, WhisperBackend):
+                model = entry.model
+                mel = batched_log_mel([clips[i] for i in short], model.dims.n_mels, model.device)
+                if entry.fp16:
+                    mel = mel.half()
+                options = whisper.DecodingOptions(language=language, without_timestamps=True,
+                                                  fp16=entry.fp16)
+                decoded = whisper.decode(model, mel, options)
+
+        for i, result in zip(short, decoded):
+            if fallback and _needs_fallback(result):
+                continue
+            duration = len(clips[i]) / SAMPLE_RATE
+            silent = result.no_speech_prob > NO_SPEECH_THRESHOLD and result.avg_logprob < LOGPROB_THRESHOLD
+            text = "" if silent else result.text
+            results[i] = {
+                "text": text,
+                "language": result.language,
+                "segments": [{"start": 0.0, "end": round(duration, 3), "text": " " + text}] if text else [],
+            }
+            if result_cache:
+                result_cache.put(keys[i], results[i])
+
+    for i, clip in enumerate(clips):
+        if results[i] is None:
+            results[i] = transcribe_audio(clip, model_size, cache=cache, language=language,
+                                          use_result_cache=use_result_cache)
+    return results
@@ -0,0 +1,591 @@
+#!/usr/bin/env python3
+
+# Performance benchmarks for the speech pipeline.
+#
+#   python benchmark.py capture            # capture buffer overhead and peak memory
+#   python benchmark.py server clip.wav    # load-test a running server.py --no-result-cache
+#   python benchmark.py batching clips/    # batched vs unbatched decoding throughput
+#   python benchmark.py quantization clips/ # FP32 vs INT8 speed, memory and WER per model
+#   python benchmark.py backends clips/     # conformance and speed of every installed backend
+#   python benchmark.py chunked long.wav    # parallel chunked vs sequential long-audio transcription
+#   python benchmark.py language clips/     # per-utterance detection vs pinned language vs .en models
+#   python benchmark.py profiles clips/     # p50/p95 latency and WER per decoding profile
+
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import multiprocessing
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+import tracemalloc
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+def _print_table(headers, rows):
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+def _percentile(values, pct):
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+def _measure(func):
+    """Return (seconds, peak traced bytes); timed without tracemalloc overhead"""
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+# --- capture ---------------------------------------------------------------
+
+def _capture_with_list(chunks):
+    # The original AudioRecorder: list of bytes, joined once at the end
+    frames = []
+    for chunk in chunks:
+        frames.append(bytes(chunk))
+    audio = np.frombuffer(b''.join(frames), dtype=np.int16).astype(np.float32)
+    audio *= 1.0 / 32768.0
+    return audio
+
+def _capture_with_buffer(chunks):
+    from audio_buffer import CaptureBuffer
+    buffer = CaptureBuffer()
+    for chunk in chunks:
+        buffer.append(bytes(chunk))
+    return buffer.to_float32()
+
+def bench_capture(args):
+    chunk = 1024
+    rate = 16000
+    rows = []
+    for seconds in args.durations:
+        n_chunks = int(seconds * rate / chunk)
+        source = np.random.default_rng(0).integers(-2000, 2000, n_chunks * chunk, dtype=np.int16)
+        # memoryviews stand in for PyAudio; bytes() materializes each read
+        chunks = [memoryview(source[i * chunk:(i + 1) * chunk]) for i in range(n_chunks)]
+        for name, func in (("list+join", _capture_with_list), ("CaptureBuffer", _capture_with_buffer)):
+            times, peaks = [], []
+            for _ in range(args.repeat):
+                elapsed, peak = _measure(lambda: func(chunks))
+                times.append(elapsed)
+                peaks.append(peak)
+            rows.append((f"{seconds:g}s", name, f"{min(times) * 1000:.1f}",
+                         f"{min(times) / n_chunks * 1e6:.2f}", f"{max(peaks) / 1e6:.1f}"))
+    _print_table(("recording", "capture", "total ms", "us/chunk", "peak MB"), rows)
+
+# --- server ----------------------------------------------------------------
+
+def _post_clip(url, body, content_type):
+    request = urllib.request.Request(url, data=body, headers={"Content-Type": content_type})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request) as response:
+            payload = json.loads(response.read())
+            status = response.status
+    except urllib.error.HTTPError as e:
+        payload, status = {}, e.code
+    return status, time.perf_counter() - start, payload
+
+def bench_server(args):
+    with open(args.clip, "rb") as f:
+        body = f.read()
+    content_type = "audio/wav" if args.clip.lower().endswith(".wav") else "audio/L16"
+    url = args.url.rstrip("/") + "/transcribe"
+
+    # One warm-up request so model loading isn't counted
+    _post_clip(url, body, content_type)
+
+    results = []
+    results_lock = threading.Lock()
+    remaining = iter(range(args.requests))
+    remaining_lock = threading.Lock()
+
+    def client():
+        while True:
+            with remaining_lock:
+                if next(remaining, None) is None:
+                    return
+            outcome = _post_clip(url, body, content_type)
+            with results_lock:
+                results.append(outcome)
+
+    start = time.perf_counter()
+    clients = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if r[0] == 200]
+    cached = sum(1 for r in ok if r[2].get("cached"))
+    if cached:
+        # Every request sends the same clip, so cached answers measure a file read, not inference
+        print(f"⚠️ {cached} of {len(ok)} responses came from the result cache; "
+              f"start server.py with --no-result-cache for real numbers")
+    latencies = [r[1] for r in ok]
+    audio_seconds = sum(r[2].get("duration", 0) for r in ok)
+    rejected = sum(1 for r in results if r[0] == 503)
+    print(f"{len(results)} requests, concurrency {args.concurrency}, {wall:.2f}s wall")
+    print(f"  ok={len(ok)} rejected(503)={rejected} other_errors={len(results) - len(ok) - rejected}")
+    print(f"  throughput: {len(ok) / wall:.2f} req/s, {audio_seconds / wall:.2f} audio-s/s")
+    print(f"  latency: p50={_percentile(latencies, 50):.3f}s p95={_percentile(latencies, 95):.3f}s "
+          f"p99={_percentile(latencies, 99):.3f}s max={max(latencies, default=float('nan')):.3f}s")
+    if ok:
+        waits = [r[2].get("queue_wait", 0) for r in ok]
+        print(f"  queue wait: p50={_percentile(waits, 50):.3f}s p95={_percentile(waits, 95):.3f}s")
+
+# --- batching --------------------------------------------------------------
+
+def _load_clips(paths, limit=None):
+    from batch_transcribe import find_audio_files
+    from transcription import load_audio_file
+    files = find_audio_files(paths)[:limit]
+    return [(str(f), load_audio_file(f)) for f in files]
+
+def bench_batching(args):
+    from batching import transcribe_batch
+    from transcription import get_model_cache
+
+    clips = [audio for _, audio in _load_clips(args.clips)]
+    if not clips:
+        print("No clips found")
+        return
+    clips = (clips * (args.count // len(clips) + 1))[:args.count]
+    audio_seconds = sum(len(c) for c in clips) / 16000
+
+    get_model_cache().get(args.model)
+    # Repeated clips would otherwise be answered from the result cache
+    transcribe_batch(clips[:1], args.model, use_result_cache=False)  # warm-up
+
+    rows = []
+    baseline = None
+    for batch_size in args.batch_sizes:
+        start = time.perf_counter()
+        for i in range(0, len(clips), batch_size):
+            transcribe_batch(clips[i:i + batch_size], args.model, fallback=not args.no_fallback,
+                             use_result_cache=False)
+        elapsed = time.perf_counter() - start
+        if baseline is None:
+            baseline = elapsed
+        rows.append((batch_size, f"{elapsed:.2f}", f"{len(clips) / elapsed:.2f}",
+                     f"{audio_seconds / elapsed:.2f}", f"{baseline / elapsed:.2f}x"))
+    print(f"{len(clips)} clips, {audio_seconds:.1f}s of audio, model {args.model}")
+    _print_table(("batch", "seconds", "clips/s", "audio-s/s", "speedup"), rows)
+
+# --- quantization ----------------------------------------------------------
+
+def _words(text):
+    return re.sub(r"[^\w\s']", " ", text.lower()).split()
+
+def word_error_rate(reference, hypothesis):
+    """Word-level edit distance divided by the reference length"""
+    ref, hyp = _words(reference), _words(hypothesis)
+    previous = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, start=1):
+        current = [i] + [0] * len(hyp)
+        for j, hyp_word in enumerate(hyp, start=1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1,
+                             previous[j - 1] + (ref_word != hyp_word))
+        previous = current
+    return previous[-1] / max(1, len(ref))
+
+def _run_precision(model_size, precision, clip_paths, threads):
+    # Runs in a fresh process so RSS reflects this model alone
+    import torch
+    from transcription import ModelCache, current_rss_bytes, load_audio_file
+
+    torch.set_num_threads(threads)
+    clips = [load_audio_file(path) for path in clip_paths]
+    cache = ModelCache(budget_mb=1 << 20)
+    rss_before = current_rss_bytes() or 0
+    start = time.perf_counter()
+    entry = cache.get(model_size, "cpu", precision, "whisper")
+    load_seconds = time.perf_counter() - start
+    rss_after = current_rss_bytes() or 0
+
+    model = entry.model
+    model.transcribe(clips[0][:16000], fp16=False)  # warm-up
+    texts = []
+    start = time.perf_counter()
+    for clip in clips:
+        texts.append(model.transcribe(clip, fp16=False, temperature=0.0)["text"])
+    elapsed = time.perf_counter() - start
+    return {
+        "load_seconds": load_seconds,
+        "rss_mb": (rss_after - rss_before) / 1e6,
+        "weights_mb": entry.nbytes / 1e6,
+        "seconds": elapsed,
+        "texts": texts,
+    }
+
+def bench_quantization(args):
+    from batch_transcribe import find_audio_files
+    from transcription import load_audio_file
+
+    files = find_audio_files(args.clips)
+    if not files:
+        print("No clips found")
+        return
+    # A transcript next to each clip (clip.wav -> clip.txt) enables WER
+    references = [Path(f).with_suffix(".txt") for f in files]
+    references = [r.read_text(encoding="utf-8") if r.exists() else None for r in references]
+    paths = [str(f) for f in files]
+    audio_seconds = sum(len(load_audio_file(path)) for path in paths) / 16000
+    context = multiprocessing.get_context("spawn")
+
+    rows = []
+    for model_size in args.models:
+        baseline = None
+        for precision in ("fp32", "int8"):
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                stats = pool.submit(_run_precision, model_size, precision, paths, args.threads).result()
+            if baseline is None:
+                baseline = stats["seconds"]
+            scored = [(ref, hyp) for ref, hyp in zip(references, stats["texts"]) if ref is not None]
+            wer = (f"{sum(word_error_rate(ref, hyp) for ref, hyp in scored) / len(scored) * 100:.1f}%"
+                   if scored else "n/a")
+            rows.append((model_size, precision, f"{stats['load_seconds']:.1f}",
+                         f"{stats['weights_mb']:.0f}", f"{stats['rss_mb']:.0f}",
+                         f"{stats['seconds']:.2f}", f"{audio_seconds / stats['seconds']:.2f}",
+                         f"{baseline / stats['seconds']:.2f}x", wer))
+    print(f"{len(paths)} clips, {audio_seconds:.1f}s of audio, {args.threads} threads, "
+          f"{sum(r is not None for r in references)} with reference transcripts")
+    _print_table(("model", "precision", "load s", "weights MB", "RSS MB", "seconds",
+                  "audio-s/s", "speedup", "WER"), rows)
+    print("The first int8 run per model quantizes and caches its weights, so its load time is higher")
+
+# --- backends --------------------------------------------------------------
+
+def _check_result(result, duration):
+    """Problems with a transcribe() result, per the InferenceBackend contract"""
+    if not isinstance(result, dict):
+        return [f"result is {type(result).__name__}, not dict"]
+    problems = []
+    if not isinstance(result.get("text"), str):
+        problems.append("missing text")
+    segments = result.get("segments")
+    if not isinstance(segments, list):
+        return problems + ["missing segments"]
+    previous_start = 0.0
+    for segment in segments:
+        if not all(k in segment for k in ("start", "end", "text")):
+            problems.append("segment without start/end/text")
+            break
+        if segment["start"] < previous_start - 1e-3 or segment["end"] < segment["start"]:
+            problems.append(f"segment times out of order at {segment['start']:.2f}s")
+            break
+        if segment["end"] > duration + 1.0:
+            problems.append(f"segment ends at {segment['end']:.2f}s past the {duration:.2f}s clip")
+            break
+        previous_start = segment["start"]
+    if isinstance(result.get("text"), str) and _words(result["text"]) != _words("".join(s.get("text", "") for s in segments)):
+        problems.append("text doesn't match the joined segments")
+    return problems
+
+def _run_backend(name, model_size, clip_paths, threads):
+    # Runs in a fresh process so one backend's memory or crash doesn't skew the next
+    import torch
+    from transcription import ModelCache, TranscriptionCancelled, current_rss_bytes, load_audio_file
+
+    torch.set_num_threads(threads)
+    clips = [load_audio_file(path) for path in clip_paths]
+    cache = ModelCache(budget_mb=1 << 20)
+    rss_before = current_rss_bytes() or 0
+    start = time.perf_counter()
+    entry = cache.get(model_size, backend=name)
+    load_seconds = time.perf_counter() - start
+    rss_mb = ((current_rss_bytes() or 0) - rss_before) / 1e6
+    backend = entry.backend
+    problems = []
+
+    # Silence must come back as a well-formed, empty-ish result
+    problems += [f"silence: {p}" for p in _check_result(
+        backend.transcribe(entry, np.zeros(16000, dtype=np.float32), temperature=0.0), 1.0)]
+
+    texts = []
+    start = time.perf_counter()
+    for path, clip in zip(clip_paths, clips):
+        result = backend.transcribe(entry, clip, temperature=0.0)
+        problems += [f"{Path(path).name}: {p}" for p in _check_result(result, len(clip) / 16000)]
+        texts.append(result.get("text", "") if isinstance(result, dict) else "")
+    elapsed = time.perf_counter() - start
+
+    streamed = " ".join(segment["text"] for segment in backend.stream(entry, clips[0], temperature=0.0))
+    if word_error_rate(texts[0], streamed) > 0.1:
+        problems.append("stream() disagrees with transcribe()")
+
+    cancel_event = threading.Event()
+    cancel_event.set()
+    try:
+        backend.transcribe(entry, clips[0], cancel_event=cancel_event)
+        problems.append("ignores a set cancel_event")
+    except TranscriptionCancelled:
+        pass
+
+    return {
+        "load_seconds": load_seconds,
+        "rss_mb": rss_mb,
+        "seconds": elapsed,
+        "texts": texts,
+        "problems": problems,
+    }
+
+def bench_backends(args):
+    from batch_transcribe import find_audio_files
+    from transcription import available_backends, load_audio_file
+
+    files = find_audio_files(args.clips)
+    if not files:
+        print("No clips found")
+        return 1
+    paths = [str(f) for f in files]
+    references = [Path(f).with_suffix(".txt") for f in files]
+    references = [r.read_text(encoding="utf-8") if r.exists() else None for r in references]
+    audio_seconds = sum(len(load_audio_file(path)) for path in paths) / 16000
+    names = args.backends or sorted(available_backends(), key=lambda n: n != "whisper")
+    context = multiprocessing.get_context("spawn")
+
+    rows, failures = [], {}
+    reference_texts = None
+    for name in names:
+        try:
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                stats = pool.submit(_run_backend, name, args.model, paths, args.threads).result()
+        except Exception as e:
+            failures[name] = [f"crashed: {e}"]
+            rows.append((name, "-", "-", "-", "-", "-", "-", "FAIL"))
+            continue
+        if name == "whisper":
+            reference_texts = stats["texts"]
+        scored = [(ref, hyp) for ref, hyp in zip(references, stats["texts"]) if ref is not None]
+        wer = (f"{sum(word_error_rate(ref, hyp) for ref, hyp in scored) / len(scored) * 100:.1f}%"
+               if scored else "n/a")
+        agreement = (f"{sum(word_error_rate(ref, hyp) for ref, hyp in zip(reference_texts, stats['texts'])) / len(paths) * 100:.1f}%"
+                     if reference_texts else "n/a")
+        if stats["problems"]:
+            failures[name] = stats["problems"]
+        rows.append((name, f"{stats['load_seconds']:.1f}", f"{stats['rss_mb']:.0f}",
+                     f"{stats['seconds']:.2f}", f"{audio_seconds / stats['seconds']:.2f}",
+                     wer, agreement, "FAIL" if stats["problems"] else "ok"))
+
+    print(f"{len(paths)} clips, {audio_seconds:.1f}s of audio, model {args.model}, {args.threads} threads")
+    _print_table(("backend", "load s", "RSS MB", "seconds", "audio-s/s", "WER",
+                  "vs whisper", "conformance"), rows)
+    for name, problems in failures.items():
+        print(f"\n{name}:")
+        for problem in problems:
+            print(f"  - {problem}")
+    return 1 if failures else 0
+
+# --- language --------------------------------------------------------------
+
+# (label, pass a language, run the .en checkpoint)
+LANGUAGE_MODES = (
+    ("detect every utterance", False, False),
+    ("pinned / sticky", True, False),
+    ("pinned, .en model", True, True),
+)
+
+def _run_language(checkpoint, language, clip_paths, threads):
+    # Runs in a fresh process so every checkpoint starts from the same state
+    import torch
+    from transcription import ModelCache, load_audio_file
+
+    torch.set_num_threads(threads)
+    clips = [load_audio_file(path) for path in clip_paths]
+    entry = ModelCache(budget_mb=1 << 20).get(checkpoint, "cpu")
+    options = dict(language=language, temperature=0.0)
+    entry.backend.transcribe(entry, clips[0][:16000], **options)  # warm-up
+    texts, latencies = [], []
+    for clip in clips:
+        start = time.perf_counter()
+        texts.append(entry.backend.transcribe(entry, clip, **options)["text"])
+        latencies.append(time.perf_counter() - start)
+    return {"latencies": latencies, "texts": texts}
+
+def bench_language(args):
+    from batch_transcribe import find_audio_files
+    from transcription import ENGLISH_ONLY_MODELS
+
+    files = find_audio_files(args.clips)
+    if not files:
+        print("No clips found")
+        return
+    references = [Path(f).with_suffix(".txt") for f in files]
+    references = [r.read_text(encoding="utf-8") if r.exists() else None for r in references]
+    paths = [str(f) for f in files]
+    context = multiprocessing.get_context("spawn")
+
+    rows = []
+    for model_size in args.models:
+        baseline = None
+        for label, pinned, english_only in LANGUAGE_MODES:
+            if english_only and (args.language != "en" or model_size not in ENGLISH_ONLY_MODELS):
+                continue
+            checkpoint = f"{model_size}.en" if english_only else model_size
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+                stats = pool.submit(_run_language, checkpoint, args.language if pinned else None,
+                                    paths, args.threads).result()
+            mean = sum(stats["latencies"]) / len(stats["latencies"])
+            if baseline is None:
+                baseline = mean
+            scored = [(ref, hyp) for ref, hyp in zip(references, stats["texts"]) if ref is not None]
+            wer = (f"{sum(word_error_rate(ref, hyp) for ref, hyp in scored) / len(scored) * 100:.1f}%"
+                   if scored else "n/a")
+            rows.append((model_size, label, checkpoint, f"{mean:.3f}",
+                         f"{_percentile(stats['latencies'], 95):.3f}", f"{baseline / mean:.2f}x", wer))
+    print(f"{len(paths)} clips in {args.language}, {args.threads} threads")
+    _print_table(("model", "mode", "checkpoint", "mean s", "p95 s", "speedup", "WER"), rows)
+
+# --- profiles --------------------------------------------------------------
+
+def bench_profiles(args):
+    from batch_transcribe import find_audio_files
+    from transcription import ModelCache, load_audio_file, decoding_options
+    import torch
+
+    files = find_audio_files(args.clips)
+    if not files:
+        print("No clips found")
+        return
+    references = [Path(f).with_suffix(".txt") for f in files]
+    references = [r.read_text(encoding="utf-8") if r.exists() else None for r in references]
+    clips = [load_audio_file(f) for f in files]
+    audio_seconds = sum(len(c) for c in clips) / 16000
+
+    torch.set_num_threads(args.threads)
+    entry = ModelCache(budget_mb=1 << 20).get(args.model)
+    entry.backend.transcribe(entry, clips[0][:16000], temperature=0.0)  # warm-up
+
+    rows = []
+    for profile in args.profiles:
+        options = decoding_options(profile=profile)
+        latencies, texts = [], []
+        for _ in range(args.repeat):
+            for clip in clips:
+                start = time.perf_counter()
+                texts.append(entry.backend.transcribe(entry, clip, **options)["text"])
+                latencies.append(time.perf_counter() - start)
+        scored = [(ref, hyp) for ref, hyp in zip(references * args.repeat, texts) if ref is not None]
+        wer = (f"{sum(word_error_rate(ref, hyp) for ref, hyp in scored) / len(scored) * 100:.1f}%"
+               if scored else "n/a")
+        rows.append((profile, f"{_percentile(latencies, 50):.3f}", f"{_percentile(latencies, 95):.3f}",
+                     f"{max(latencies):.3f}", f"{audio_seconds * args.repeat / sum(latencies):.2f}", wer))
+    print(f"{len(clips)} clips, {audio_seconds:.1f}s of audio, model {args.model}, {args.threads} threads, "
+          f"{sum(r is not None for r in references)} with reference transcripts")
+    _print_table(("profile", "p50 s", "p95 s", "max s", "audio-s/s", "WER"), rows)
+
+# --- chunked ---------------------------------------------------------------
+
+def bench_chunked(args):
+    from batch_transcribe import make_pool, warm_pool, transcribe_chunked, _transcribe_file
+    from transcription import load_audio_file
+
+    audio = load_audio_file(args.clip)
+    audio_seconds = len(audio) / 16000
+    # Every run decodes the same audio, so later runs would hit the result cache
+    options = {"use_result_cache": False}
+
+    # Baseline: one model.transcribe call over the whole file with every core
+    with make_pool(args.model, 1) as pool:
+        warm_pool(pool, 1)
+        start = time.perf_counter()
+        reference = pool.submit(_transcribe_file, args.clip, options).result()["text"]
+        baseline = time.perf_counter() - start
+    rows = [("sequential", 1, 1, f"{baseline:.2f}", f"{audio_seconds / baseline:.2f}", "1.00x", "-")]
+
+    for workers in args.workers:
+        with make_pool(args.model, workers) as pool:
+            warm_pool(pool, workers)  # model loading isn't part of the timing
+            start = time.perf_counter()
+            result = transcribe_chunked(pool, audio, options, chunk_seconds=args.chunk_seconds)
+            elapsed = time.perf_counter() - start
+        # Word differences from the sequential transcript show what the chunk seams cost
+        drift = word_error_rate(reference, result["text"]) * 100
+        rows.append(("chunked", workers, result["chunks"], f"{elapsed:.2f}",
+                     f"{audio_seconds / elapsed:.2f}", f"{baseline / elapsed:.2f}x", f"{drift:.1f}%"))
+    print(f"{args.clip}: {audio_seconds:.1f}s of audio, model {args.model}, "
+          f"~{args.chunk_seconds:.0f}s chunks")
+    _print_table(("mode", "workers", "chunks", "seconds", "audio-s/s", "speedup", "WER vs seq"), rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Speech pipeline benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    capture = sub.add_parser("capture", help="capture buffer overhead and peak memory")
+    capture.add_argument("--durations", type=float, nargs="+", default=[10, 60, 600])
+    capture.add_argument("--repeat", type=int, default=3)
+    capture.set_defaults(func=bench_capture)
+
+    server = sub.add_parser("server", help="load-test a running server.py")
+    server.add_argument("clip", help="WAV (or raw 16 kHz int16 PCM) file to send")
+    server.add_argument("--url", default="http://127.0.0.1:8765")
+    server.add_argument("--requests", type=int, default=50)
+    server.add_argument("--concurrency", type=int, default=4)
+    server.set_defaults(func=bench_server)
+
+    batching = sub.add_parser("batching", help="batched vs unbatched decoding throughput")
+    batching.add_argument("clips", nargs="+", help="clip files or directories")
+    batching.add_argument("--model", default="base")
+    batching.add_argument("--count", type=int, default=16, help="clips per run (repeats inputs)")
+    batching.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    batching.add_argument("--no-fallback", action="store_true",
+                          help="time the batched decode alone, without per-clip quality fallbacks")
+    batching.set_defaults(func=bench_batching)
+
+    quantization = sub.add_parser("quantization", help="FP32 vs INT8 speed, memory and WER per model")
+    quantization.add_argument("clips", nargs="+", help="clip files or directories; clip.txt holds the reference")
+    quantization.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    quantization.add_argument("--threads", type=int, default=4)
+    quantization.set_defaults(func=bench_quantization)
+
+    backends = sub.add_parser("backends", help="conformance and speed of every installed backend")
+    backends.add_argument("clips", nargs="+", help="clip files or directories; clip.txt holds the reference")
+    backends.add_argument("--backends", nargs="+", help="backends to compare (default: all installed)")
+    backends.add_argument("--model", default="base")
+    backends.add_argument("--threads", type=int, default=4)
+    backends.set_defaults(func=bench_backends)
+
+    chunked = sub.add_parser("chunked", help="parallel chunked vs sequential long-audio transcription")
+    chunked.add_argument("clip", help="long audio file")
+    chunked.add_argument("--model", default="base")
+    chunked.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    chunked.add_argument("--chunk-seconds", type=float, default=60.0)
+    chunked.set_defaults(func=bench_chunked)
+
+    language = sub.add_parser("language", help="per-utterance detection vs pinned language vs .en models")
+    language.add_argument("clips", nargs="+", help="clip files or directories; clip.txt holds the reference")
+    language.add_argument("--models", nargs="+", default=["tiny", "base", "small"])
+    language.add_argument("--language", default="en", help="language the clips are spoken in")
+    language.add_argument("--threads", type=int, default=4)
+    language.set_defaults(func=bench_language)
+
+    profiles = sub.add_parser("profiles", help="p50/p95 latency and WER per decoding profile")
+    profiles.add_argument("clips", nargs="+", help="clip files or directories; clip.txt holds the reference")
+    profiles.add_argument("--model", default="base")
+    profiles.add_argument("--profiles", nargs="+", default=["fast", "balanced", "accurate"])
+    profiles.add_argument("--repeat", type=int, default=1, help="passes over the clips per profile")
+    profiles.add_argument("--threads", type=int, default=4)
+    profiles.set_defaults(func=bench_profiles)
+
+    args = parser.parse_args()
+    return args.func(args)
+
+if __name__ == "__main__":
+    sys.exit(main())
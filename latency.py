@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+
+# Per-utterance latency tracing for the hotkey-to-paste pipeline. Each
+# utterance gets a LatencyTrace of named spans on the perf_counter clock.
+# Finished traces feed rolling per-stage p50/p95/p99 figures and, with the
+# latency_log setting on, are appended to ~/.whisper_app/latency/ as JSONL
+# and as a Chrome trace-event file (open it in chrome://tracing or
+# ui.perfetto.dev).
+
+import os
+import json
+import time
+import threading
+from collections import deque, defaultdict
+from contextlib import contextmanager, nullcontext
+
+from settings import get_setting, app_data_dir
+
+class LatencyTrace:
+    """Timestamped stages of one utterance, from hotkey press to paste"""
+
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        # Wall-clock time of the origin, for the exported records
+        self.started_at = time.time() - (time.perf_counter() - self.origin)
+        self.utterance = None
+        self.spans = []  # (stage, start, end, thread ident, thread name)
+        self._lock = threading.Lock()
+
+    def add(self, stage, start, end=None):
+        """Record a stage that ran from start to end (now if omitted)"""
+        end = time.perf_counter() if end is None else end
+        thread = threading.current_thread()
+        with self._lock:
+            self.spans.append((stage, start, end, thread.ident, thread.name))
+
+    def mark(self, stage):
+        """Record an instant, e.g. a result becoming ready"""
+        now = time.perf_counter()
+        self.add(stage, now, now)
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, start)
+
+    def last(self, stage):
+        """End time of the latest occurrence of stage, or None"""
+        with self._lock:
+            for name, _, end, _, _ in reversed(self.spans):
+                if name == stage:
+                    return end
+        return None
+
+    def durations(self):
+        """Seconds per stage (repeated stages add up), without instants"""
+        totals = defaultdict(float)
+        with self._lock:
+            for stage, start, end, _, _ in self.spans:
+                if end > start:
+                    totals[stage] += end - start
+        return dict(totals)
+
+    def total(self):
+        with self._lock:
+            return max((span[2] for span in self.spans), default=self.origin) - self.origin
+
+    def to_record(self):
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s[1])
+        return {
+            "utterance": self.utterance,
+            "started_at": round(self.started_at, 3),
+            "total_ms": round(self.total() * 1000, 2),
+            "stages": [
+                {"stage": stage, "start_ms": round((start - self.origin) * 1000, 2),
+                 "duration_ms": round((end - start) * 1000, 2), "thread": thread}
+                for stage, start, end, _, thread in spans
+            ],
+        }
+
+    def threads(self):
+        """{thread ident: name} of the threads that recorded stages"""
+        with self._lock:
+            return {ident: name for _, _, _, ident, name in self.spans}
+
+    def trace_events(self, pid):
+        """Chrome trace events: complete events for spans, instant events for marks"""
+        events = []
+        with self._lock:
+            spans = list(self.spans)
+        for stage, start, end, ident, _ in spans:
+            event = {"name": stage, "cat": "utterance", "pid": pid, "tid": ident,
+                     "ts": round(start * 1e6, 1), "args": {"utterance": self.utterance}}
+            if end > start:
+                event.update(ph="X", dur=round((end - start) * 1e6, 1))
+            else:
+                event.update(ph="i", s="t")
+            events.append(event)
+        return events
+
+def span(trace, stage):
+    """trace.span(stage), or a no-op when there's no trace"""
+    return trace.span(stage) if trace else nullcontext()
+
+def _percentile(ordered, pct):
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+class LatencyTracker:
+    """Rolling per-stage latency percentiles over the last `window` utterances"""
+
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, window=500, directory=None):
+        self.window = window
+        self.directory = directory or app_data_dir() / "latency"
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._lock = threading.Lock()
+        self._trace_file = None
+        self._named_threads = set()
+
+    def begin(self, origin=None):
+        return LatencyTrace(origin)
+
+    def finish(self, trace):
+        """Fold a completed utterance into the percentiles and export it"""
+        durations = trace.durations()
+        durations["total"] = trace.total()
+        released = trace.last("release")
+        if released is not None:
+            # What the user waits for: key release to the paste
+            durations["after_release"] = trace.origin + durations["total"] - released
+        with self._lock:
+            for stage, seconds in durations.items():
+                self._samples[stage].append(seconds)
+        stages = ", ".join(f"{stage} {seconds * 1000:.0f}ms" for stage, seconds in durations.items()
+                           if stage not in ("total", "after_release"))
+        headline = durations.get("after_release", durations["total"])
+        print(f"⏱️ Utterance #{trace.utterance}: {headline * 1000:.0f}ms ({stages})")
+        if get_setting("latency_log"):
+            self._export(trace)
+
+    def summary(self):
+        """{stage: {"count": n, "p50": s, "p95": s, "p99": s}}"""
+        with self._lock:
+            stages = {stage: sorted(samples) for stage, samples in self._samples.items()}
+        return {
+            stage: {"count": len(ordered), **{f"p{pct}": _percentile(ordered, pct) for pct in self.PERCENTILES}}
+            for stage, ordered in stages.items() if ordered
+        }
+
+    def report(self):
+        """Human-readable table of the rolling percentiles, slowest stages first"""
+        summary = self.summary()
+        lines = [f"{'stage':<20} {'n':>5} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+        for stage, stats in sorted(summary.items(), key=lambda item: -item[1]["p95"]):
+            lines.append(f"{stage:<20} {stats['count']:>5} {stats['p50'] * 1000:>8.1f} "
+                         f"{stats['p95'] * 1000:>8.1f} {stats['p99'] * 1000:>8.1f}")
+        return "\n".join(lines)
+
+    def _export(self, trace):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(self.directory / "utterances.jsonl", "a", encoding="utf-8") as f:
+                f.write(json.dumps(trace.to_record()) + "\n")
+            with self._lock:
+                if self._trace_file is None:
+                    # One file per run; the JSON array format allows leaving the
+                    # array unclosed, so events can be appended as they come
+                    name = time.strftime("trace-%Y%m%d-%H%M%S.json")
+                    self._trace_file = self.directory / name
+                    self._trace_file.write_text("[\n", encoding="utf-8")
+                with open(self._trace_file, "a", encoding="utf-8") as f:
+                    # Label each thread's row once
+                    for ident, name in trace.threads().items():
+                        if ident not in self._named_threads:
+                            self._named_threads.add(ident)
+                            f.write(json.dumps({"name": "thread_name", "ph": "M", "pid": os.getpid(),
+                                                "tid": ident, "args": {"name": name}}) + ",\n")
+                    for event in trace.trace_events(os.getpid()):
+                        f.write(json.dumps(event) + ",\n")
+        except Exception as e:
+            print(f"Warning: could not export latency trace: {e}")
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+def get_latency_tracker():
+    """Return the process-wide latency tracker"""
+    global _tracker
+    with _tracker_lock:
+        if _tracker is None:
+            _tracker = LatencyTracker()
+        return _tracker
@@ -1,29 +1,30 @@
 #!/usr/bin/env python3
 
 import sys
-import os
-import ssl
 import threading
 import queue
 import time
-import tempfile
-import wave
 import pyaudio
-import numpy as np
-import whisper
 import pyperclip
-from typing import Optional
-import gc
 import atexit
 import signal
-
-# Handle SSL certificate issues for model downloads
-ssl._create_default_https_context = ssl._create_unverified_context
+import html
+from collections import deque
+from transcription import (
+    MODELS, DEFAULT_MODEL, transcribe_audio, warm_up_model, StreamingTranscript, WindowedTranscript,
+    TranscriptionCancelled, apply_thread_settings, AUTO_MODEL, choose_model,
+    get_model_cache, get_realtime_factors, model_n_mels, get_language_policy, DECODING_PROFILES
+)
+from settings import get_setting, set_setting
+from vad import trim_silence
+from audio_buffer import CaptureBuffer, RingBuffer
+from mel_frontend import StreamingLogMel
+from latency import get_latency_tracker, span
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QSystemTrayIcon, QMenu,
     QVBoxLayout, QHBoxLayout, QWidget, QLabel, QPushButton,
-    QComboBox, QTextEdit, QProgressBar, QMessageBox
+    QComboBox, QTextEdit, QProgressBar, QMessageBox, QCheckBox
 )
 from PyQt6.QtCore import QThread, pyqtSignal, QTimer, Qt
 from PyQt6.QtGui import QIcon, QPixmap, QAction
@@ -41,63 +42,434 @@ except ImportError:
 app_instance = None
 shutdown_in_progress = False
 
+class TranscriptionJob:
+    """One recorded utterance waiting for the transcription worker"""
+
+    def __init__(self, seq, audio, model_size, draft_model=None, mel=None, trace=None):
+        self.seq = seq
+        self.audio = audio
+        self.model_size = model_size
+        # Log-mel computed while recording, so Whisper skips the STFT
+        self.mel = mel
+        # Two-pass mode: answer with draft_model first, then refine with model_size
+        self.draft_model = draft_model
+        self.refining = False
+        self.draft_seconds = None
+        # Per-stage latency of the first pass, from hotkey press to paste
+        self.trace = trace
+        self.cancel_event = threading.Event()
+        self.submitted = time.perf_counter()
+
 class WhisperProcessor(QThread):
-    transcription_ready = pyqtSignal(str)
-    processing_finished = pyqtSignal()
+    """Persistent transcription worker draining a FIFO job queue"""
+    transcription_ready = pyqtSignal(int, str)
+    transcription_cancelled = pyqtSignal(int)
+    processing_finished = pyqtSignal(int)
+    # seq, refined text, seconds to draft, seconds to refined text
+    refinement_ready = pyqtSignal(int, str, float, float)
+    # Sticky language mode settled on a language
+    language_detected = pyqtSignal(str)
 
-    def __init__(self, audio_file, model_size="base"):
+    def __init__(self):
         super().__init__()
-        self.audio_file = audio_file
-        self.model_size = model_size
-        self._model = None
+        self.jobs = queue.Queue()
+        # Only touched by the worker thread
+        self.refinements = deque()
+        self.current_job = None
         self._cleanup_done = False
 
+    def submit(self, job):
+        self.jobs.put(job)
+
+    def cancel_current(self):
+        """Abort the utterance being transcribed; queued ones still run"""
+        job = self.current_job
+        if job is None:
+            return False
+        job.cancel_event.set()
+        return True
+
+    def _next_job(self):
+        # New utterances go first; refinements run when nothing else is waiting
+        if self.refinements:
+            try:
+                return self.jobs.get_nowait()
+            except queue.Empty:
+                return self.refinements.popleft()
+        return self.jobs.get()
+
+    def _resolve_model(self, job, model_size):
+        if model_size != AUTO_MODEL:
+            return model_size
+        # Time spent queued comes out of this utterance's budget
+        duration = len(job.audio) / 16000
+        budget = get_setting("latency_budget_s") - (time.perf_counter() - job.submitted)
+        model_size = choose_model(duration, budget)
+        print(f"Auto model: {model_size} for {duration:.1f}s within {budget:.1f}s")
+        return model_size
+
+    def _transcribe(self, job, model_size, trace=None):
+        # A known language skips detection and may swap in the English-only checkpoint
+        policy = get_language_policy()
+        checkpoint, language = policy.route(model_size)
+        # Models stay resident in the shared cache between utterances
+        print(f"Transcribing utterance #{job.seq} with {checkpoint} ({language or 'detect language'})...")
+        # Thread counts are per model size and torch applies them per calling thread
+        apply_thread_settings(model_size)
+        # Load before timing so the real-time factor measures inference only
+        with span(trace, "model_load"):
+            get_model_cache().get(checkpoint)
+        start = time.perf_counter()
+        with span(trace, "transcribe"):
+            # Dictations would sit on disk as plaintext, so they skip the result cache unless asked
+            result = transcribe_audio(job.audio, checkpoint, cancel_event=job.cancel_event, mel=job.mel,
+                                      use_result_cache=get_setting("dictation_result_cache"),
+                                      language=language)
+        if result.get("from_cache"):
+            print(f"Utterance #{job.seq} answered from the result cache")
+        else:
+            get_realtime_factors().record(model_size, len(job.audio) / 16000, time.perf_counter() - start)
+        if policy.observe(result.get("language")):
+            self.language_detected.emit(result["language"])
+        return result["text"].strip()
+
     def run(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                break
+            self.current_job = job
+            if job.refining:
+                self._refine(job)
+            else:
+                self._first_pass(job)
+
+    def _first_pass(self, job):
+        cancelled = False
+        if job.trace:
+            job.trace.add("queue_wait", job.submitted)
         try:
-            # Load model fresh each time to avoid memory issues
-            print(f"Loading Whisper model: {self.model_size}")
-            self._model = whisper.load_model(self.model_size)
-
-            print("Transcribing audio...")
-            result = self._model.transcribe(self.audio_file)
-            text = result["text"].strip()
-            print(f"Transcription complete: {text[:50]}...")
-            self.transcription_ready.emit(text)
+            text = self._transcribe(job, job.draft_model or self._resolve_model(job, job.model_size), job.trace)
+            print(f"Transcription #{job.seq} complete: {text[:50]}...")
+            self.transcription_ready.emit(job.seq, text)
+            if job.draft_model:
+                job.draft_seconds = time.perf_counter() - job.submitted
+                print(f"Draft #{job.seq} ready in {job.draft_seconds:.2f}s, refining later")
+                job.refining = True
+                self.refinements.append(job)
+        except TranscriptionCancelled:
+            print(f"Transcription #{job.seq} cancelled")
+            cancelled = True
+            # Empty result keeps later utterances flowing in order
+            self.transcription_ready.emit(job.seq, "")
         except Exception as e:
             print(f"Whisper processing error: {e}")
-            self.transcription_ready.emit(f"Error: {str(e)}")
+            self.transcription_ready.emit(job.seq, f"Error: {str(e)}")
         finally:
-            self.cleanup()
-            self.processing_finished.emit()
+            self.current_job = None
+            self.processing_finished.emit(job.seq)
+            if cancelled:
+                self.transcription_cancelled.emit(job.seq)
+
+    def _refine(self, job):
+        """Second pass with the selected model; the draft has already been delivered"""
+        try:
+            model_size = self._resolve_model(job, job.model_size)
+            if model_size == job.draft_model:
+                return
+            text = self._transcribe(job, model_size)
+            refine_seconds = time.perf_counter() - job.submitted
+            print(f"Refinement #{job.seq} complete in {refine_seconds:.2f}s: {text[:50]}...")
+            self.refinement_ready.emit(job.seq, text, job.draft_seconds, refine_seconds)
+        except TranscriptionCancelled:
+            print(f"Refinement #{job.seq} cancelled, keeping the draft")
+        except Exception as e:
+            print(f"Refinement error, keeping the draft: {e}")
+        finally:
+            self.current_job = None
 
     def cleanup(self):
-        """Force cleanup of resources"""
+        """Stop after the current job; the models stay in the cache"""
         if not self._cleanup_done:
-            try:
-                if self._model:
-                    del self._model
-                    self._model = None
-                # Force garbage collection
-                gc.collect()
-                self._cleanup_done = True
-            except:
-                pass
+            self.jobs.put(None)
+            self._cleanup_done = True
 
     def __del__(self):
         self.cleanup()
 
+class StreamingTranscriber(QThread):
+    """Transcribes a sliding window of the live recording while the key is held"""
+    partial_transcription = pyqtSignal(str, str)
+    transcription_ready = pyqtSignal(int, str)
+    transcription_cancelled = pyqtSignal(int)
+    processing_finished = pyqtSignal(int)
+
+    def __init__(self, recorder, model_size="base", interval=1.0):
+        super().__init__()
+        self.recorder = recorder
+        self.model_size = model_size
+        self.interval = interval
+        self.transcript = StreamingTranscript(sample_rate=recorder.fs)
+        self.final_audio = None
+        self.seq = None
+        self.cancel_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._cleanup_done = False
+
+    def finish(self, audio, seq=None):
+        """Recording stopped: decode the unstable tail of the final audio"""
+        self.final_audio = audio
+        self.seq = seq
+        self._stop_event.set()
+
+    def cancel(self):
+        """Drop the final decode; the in-flight pass stops at its next step"""
+        self.cancel_event.set()
+        self._stop_event.set()
+
+    def _decode(self, window):
+        if len(window) < self.recorder.fs // 10:
+            return []
+        checkpoint, language = get_language_policy().route(self.model_size)
+        # Partial windows never repeat, so they'd only churn the result cache
+        # Passes come every interval, so they always decode greedily without retries
+        result = transcribe_audio(window, checkpoint, cancel_event=self.cancel_event,
+                                  use_result_cache=False, profile="fast", language=language)
+        return result["segments"]
+
+    def run(self):
+        apply_thread_settings(self.model_size)
+        decoded_samples = 0
+        while not self._stop_event.wait(self.interval):
+            try:
+                captured = self.recorder.captured_samples()
+                # Skip the pass until at least half a second of new audio arrived
+                if captured - decoded_samples < self.recorder.fs // 2:
+                    continue
+                start = self.transcript.committed_sample
+                window = self.recorder.captured_audio(start)
+                decoded_samples = start + len(window)
+                segments = self._decode(window)
+                committed, tentative = self.transcript.update(segments, decoded_samples / self.recorder.fs)
+                self.partial_transcription.emit(committed, tentative)
+            except TranscriptionCancelled:
+                break
+            except Exception as e:
+                # Keep going: the final decode on release still has to happen
+                print(f"Live transcription pass failed: {e}")
+
+        if self.seq is None:
+            self.cleanup()
+            return
+        cancelled = False
+        try:
+            text = self.transcript.committed_text
+            if self.final_audio is not None:
+                print(f"Decoding unstable tail from {self.transcript.committed_until:.2f}s")
+                tail = self.final_audio[self.transcript.committed_sample:]
+                text = self.transcript.finish(self._decode(tail))
+            print(f"Streaming transcription complete: {text[:50]}...")
+            self.transcription_ready.emit(self.seq, text)
+        except TranscriptionCancelled:
+            print(f"Streaming transcription #{self.seq} cancelled")
+            cancelled = True
+            self.transcription_ready.emit(self.seq, "")
+        except Exception as e:
+            print(f"Streaming transcription error: {e}")
+            self.transcription_ready.emit(self.seq, f"Error: {str(e)}")
+        finally:
+            self.cleanup()
+            self.processing_finished.emit(self.seq)
+            if cancelled:
+                self.transcription_cancelled.emit(self.seq)
+
+    def cleanup(self):
+        self._stop_event.set()
+        self._cleanup_done = True
+
+class WindowedTranscriber(QThread):
+    """Transcribes each completed 30 s window of a long dictation while recording continues
+
+    At release only the final partial window is left to decode. Recordings
+    that never fill a window are handed to the WhisperProcessor as usual.
+    """
+    transcription_ready = pyqtSignal(int, str)
+    transcription_cancelled = pyqtSignal(int)
+    processing_finished = pyqtSignal(int)
+
+    def __init__(self, recorder, model_size="base", overlap=1.0, interval=0.5):
+        super().__init__()
+        self.recorder = recorder
+        self.model_size = model_size
+        self.interval = interval
+        self.transcript = WindowedTranscript(sample_rate=recorder.fs, overlap=overlap)
+        self.windows_started = 0
+        self.final_audio = None
+        self.seq = None
+        self.cancel_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._cleanup_done = False
+
+    @property
+    def started(self):
+        """True once a window has been handed to the model"""
+        return self.windows_started > 0
+
+    def finish(self, audio, seq=None):
+        """Recording stopped: decode what's left after the committed windows"""
+        self.final_audio = audio
+        self.seq = seq
+        self._stop_event.set()
+
+    def cancel(self):
+        self.cancel_event.set()
+        self._stop_event.set()
+
+    def _decode(self, audio):
+        if len(audio) < self.recorder.fs // 10:
+            return []
+        checkpoint, language = get_language_policy().route(self.model_size)
+        # Windows of a live recording never repeat, so skip the result cache
+        result = transcribe_audio(audio, checkpoint, cancel_event=self.cancel_event, use_result_cache=False,
+                                  initial_prompt=self.transcript.prompt, language=language)
+        return result["segments"]
+
+    def run(self):
+        apply_thread_settings(self.model_size)
+        fs = self.recorder.fs
+        while not self._stop_event.wait(self.interval):
+            start = self.transcript.next_sample
+            end = start + self.transcript.window_samples
+            if self.recorder.captured_samples() < end:
+                continue
+            try:
+                self.windows_started += 1
+                print(f"Transcribing window {start / fs:.1f}-{end / fs:.1f}s in the background")
+                window = self.recorder.captured_audio(start)[:end - start]
+                self.transcript.add_window(self._decode(window), start, end)
+            except TranscriptionCancelled:
+                break
+            except Exception as e:
+                # Stop windowing; the release decode starts at the last committed window
+                print(f"Background window failed, finishing at release: {e}")
+                break
+        # After a failed window, the utterance is still ours to finish on release
+        self._stop_event.wait()
+
+        if self.seq is None:
+            self.cleanup()
+            return
+        cancelled = False
+        try:
+            text = self.transcript.committed_text
+            if self.final_audio is not None:
+                start = self.transcript.next_sample
+                print(f"Decoding final window from {start / fs:.2f}s")
+                text = self.transcript.finish(self._decode(self.final_audio[start:]), start)
+            print(f"Windowed transcription complete: {text[:50]}...")
+            self.transcription_ready.emit(self.seq, text)
+        except TranscriptionCancelled:
+            print(f"Windowed transcription #{self.seq} cancelled")
+            cancelled = True
+            self.transcription_ready.emit(self.seq, "")
+        except Exception as e:
+            print(f"Windowed transcription error: {e}")
+            self.transcription_ready.emit(self.seq, f"Error: {str(e)}")
+        finally:
+            self.cleanup()
+            self.processing_finished.emit(self.seq)
+            if cancelled:
+                self.transcription_cancelled.emit(self.seq)
+
+    def cleanup(self):
+        self._stop_event.set()
+        self._cleanup_done = True
+
+class ModelPreloader(QThread):
+    model_ready = pyqtSignal(str)
+    preload_failed = pyqtSignal(str, str)
+
+    def __init__(self, model_size="base"):
+        super().__init__()
+        self.model_size = model_size
+
+    def run(self):
+        try:
+            # Jobs for the same model block on the cache until this finishes
+            apply_thread_settings(self.model_size)
+            # Warm the checkpoint jobs will run, e.g. base.en when English is pinned
+            warm_up_model(get_language_policy().route(self.model_size)[0])
+            self.model_ready.emit(self.model_size)
+        except Exception as e:
+            print(f"Model preload error: {e}")
+            self.preload_failed.emit(self.model_size, str(e))
+
+class CaptureStats:
+    """Per-recording capture health counters, filled in by the stream callback"""
+
+    def __init__(self, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.callbacks = 0
+        self.frames = 0
+        self.overflows = 0
+        self.dropped_frames = 0
+        self._expected_adc_time = None
+
+    def record(self, frame_count, time_info, status):
+        self.callbacks += 1
+        self.frames += frame_count
+        if status & pyaudio.paInputOverflow:
+            self.overflows += 1
+
+        # A jump in the ADC timestamp means PortAudio discarded input
+        # before it reached us; not every host API fills this in
+        adc_time = time_info.get("input_buffer_adc_time", 0) if time_info else 0
+        if adc_time:
+            if self._expected_adc_time is not None:
+                gap = adc_time - self._expected_adc_time
+                if gap > frame_count / self.sample_rate / 2:
+                    self.dropped_frames += int(round(gap * self.sample_rate))
+            self._expected_adc_time = adc_time + frame_count / self.sample_rate
+
+    def as_dict(self):
+        return {
+            "callbacks": self.callbacks,
+            "frames": self.frames,
+            "overflows": self.overflows,
+            "dropped_frames": self.dropped_frames,
+        }
+
+    def __str__(self):
+        return (f"{self.frames} frames in {self.callbacks} callbacks, "
+                f"{self.overflows} overflows, {self.dropped_frames} dropped frames")
+
 class AudioRecorder:
     def __init__(self):
         self.chunk = 1024
         self.sample_format = pyaudio.paInt16
         self.channels = 1
         self.fs = 16000  # Whisper works best with 16kHz
-        self.frames = []
+        self.buffer = CaptureBuffer(sample_rate=self.fs)
         self.recording = False
         self.stream = None
         self.p = None
         self._cleanup_done = False
 
+        # The callback stream is opened once and reused for every recording.
+        # _lock is held by the callback while it writes, so clearing
+        # _capturing under it guarantees no chunk lands after stop.
+        self._lock = threading.Lock()
+        self._capturing = threading.Event()
+        self.stats = CaptureStats(self.fs)
+        self.last_stats = None
+
+        # Optional always-running stream that keeps the last moments of audio
+        self.preroll_enabled = False
+        self.preroll = RingBuffer(seconds=get_setting("preroll_ms") / 1000, sample_rate=self.fs)
+
+        # Log-mel frames computed as chunks arrive, so release skips the STFT
+        self.mel = None
+
         # Initialize PyAudio with error handling
         self.init_pyaudio()
 
@@ -118,11 +490,14 @@ class AudioRecorder:
             return
 
         try:
+            with self._lock:
+                self._capturing.clear()
+                self.recording = False
+            self.preroll_enabled = False
+
             if self.stream:
                 try:
-                    if self.recording:
-                        self.recording = False
-                        time.sleep(0.1)  # Give time for recording thread to stop
+                    # stop_stream returns once the last callback has finished
                     self.stream.stop_stream()
                     self.stream.close()
                 except:
@@ -142,92 +517,182 @@ class AudioRecorder:
         except:
             pass
 
-    def start_recording(self):
-        if self.recording or not self.p:
-            if not self.p:
-                self.init_pyaudio()
-            if not self.p:
-                return False
-
-        self.frames = []
-        self.recording = True
-
+    def _ensure_stream(self):
+        """Open the persistent callback stream (stopped) if needed"""
+        if self.stream:
+            return True
+        if not self.p:
+            self.init_pyaudio()
+        if not self.p:
+            return False
         try:
             self.stream = self.p.open(
                 format=self.sample_format,
                 channels=self.channels,
                 rate=self.fs,
                 frames_per_buffer=self.chunk,
-                input=True
+                input=True,
+                start=False,
+                stream_callback=self._on_audio
             )
-
-            # Record in a separate thread to avoid blocking
-            threading.Thread(target=self._record_audio, daemon=True).start()
             return True
-
         except Exception as e:
-            print(f"Error starting recording: {e}")
-            self.recording = False
+            print(f"Error opening audio stream: {e}")
+            self.stream = None
             return False
 
-    def _record_audio(self):
-        print("🎙️ Recording thread started")
-        frame_count = 0
-        while self.recording and self.stream:
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """PortAudio callback: route each chunk to the recording or pre-roll"""
+        with self._lock:
+            capturing = self._capturing.is_set()
+            if capturing:
+                self.stats.record(frame_count, time_info, status)
+                try:
+                    self.buffer.append(in_data)
+                except Exception:
+                    self.stats.dropped_frames += frame_count
+            elif self.preroll_enabled:
+                self.preroll.write(in_data)
+
+        # A few frames per chunk; done outside _lock so stop never waits on it
+        if capturing and self.mel:
             try:
-                data = self.stream.read(self.chunk, exception_on_overflow=False)
-                self.frames.append(data)
-                frame_count += 1
-                if frame_count % 50 == 0:  # Log every 50 frames (about every ~1 second)
-                    print(f"📊 Recorded {frame_count} frames")
+                self.mel.advance(self.buffer)
             except Exception as e:
-                print(f"Recording error: {e}")
-                break
-        print(f"🎙️ Recording thread stopped. Total frames: {frame_count}")
+                print(f"Mel frontend error, falling back to Whisper's: {e}")
+                self.mel = None
+        return (None, pyaudio.paContinue)
+
+    def set_mel_bins(self, n_mels):
+        """Compute n_mels-bin log-mel frames during the next recordings; None stops it"""
+        if self.recording:
+            return
+        if not n_mels or not get_setting("incremental_mel"):
+            self.mel = None
+            return
+        if self.mel and self.mel.n_mels == n_mels:
+            return
+        try:
+            self.mel = StreamingLogMel(n_mels)
+        except Exception as e:
+            print(f"Mel frontend unavailable: {e}")
+            self.mel = None
 
-    def stop_recording(self):
-        if not self.recording or not self.p:
-            print("Stop recording called but not recording or no PyAudio")
+    def log_mel(self, audio, start=0):
+        """Padded log-mel of captured[start:start + len(audio)], or None"""
+        if not self.mel:
+            return None
+        try:
+            self.mel.advance(self.buffer)
+            return self.mel.finish(audio, start)
+        except Exception as e:
+            print(f"Mel frontend error: {e}")
             return None
 
-        print(f"Stopping recording... frames so far: {len(self.frames)}")
-        self.recording = False
-        time.sleep(0.1)  # Give recording thread time to stop
+    def set_preroll(self, enabled):
+        """Keep the input stream running and buffer the last few hundred ms"""
+        if enabled == self.preroll_enabled:
+            return True
+        if self.recording:
+            print("Can't change pre-roll mode while recording")
+            return False
 
-        if self.stream:
+        if not enabled:
+            self.preroll_enabled = False
             try:
                 self.stream.stop_stream()
-                self.stream.close()
-            except:
-                pass
-            self.stream = None
+            except Exception as e:
+                print(f"Error stopping pre-roll stream: {e}")
+            print("🎙️ Pre-roll disabled, microphone stopped")
+            return True
 
-        if not self.frames:
-            print("❌ No audio frames recorded!")
-            return None
+        if not self._ensure_stream():
+            return False
+        self.preroll.clear()
+        self.preroll_enabled = True
+        try:
+            if not self.stream.is_active():
+                self.stream.start_stream()
+        except Exception as e:
+            print(f"Error starting pre-roll stream: {e}")
+            self.preroll_enabled = False
+            return False
+        print(f"🎙️ Pre-roll enabled ({self.preroll.capacity / self.fs:.2f}s window)")
+        return True
 
-        print(f"📊 Total frames to save: {len(self.frames)}")
+    def start_recording(self, trace=None):
+        if self.recording:
+            return False
+        with span(trace, "stream_open"):
+            if not self._ensure_stream():
+                return False
 
-        # Save to temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.wav')
+        with self._lock:
+            self.buffer.clear()
+            self.stats = CaptureStats(self.fs)
+            if self.preroll_enabled:
+                self.buffer.append(self.preroll.snapshot())
+                self.preroll.clear()
+            if self.mel:
+                self.mel.reset()
+            self.recording = True
+            self._capturing.set()
 
         try:
-            with wave.open(temp_file.name, 'wb') as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(self.p.get_sample_size(self.sample_format))
-                wf.setframerate(self.fs)
-                wf.writeframes(b''.join(self.frames))
-            print(f"✅ Audio saved to: {temp_file.name}")
-
-            # Check file size
-            file_size = os.path.getsize(temp_file.name)
-            print(f"📁 Audio file size: {file_size} bytes")
-
-            return temp_file.name
+            # With pre-roll the stream is already running: no device start
+            # on the critical path
+            with span(trace, "stream_start"):
+                if not self.stream.is_active():
+                    self.stream.start_stream()
+            if len(self.buffer):
+                print(f"🎙️ Recording started with {len(self.buffer) / self.fs:.2f}s of pre-roll")
+            return True
         except Exception as e:
-            print(f"❌ Error saving audio file: {e}")
+            print(f"Error starting recording: {e}")
+            with self._lock:
+                self._capturing.clear()
+                self.recording = False
+            return False
+
+    def captured_samples(self):
+        return len(self.buffer)
+
+    def captured_audio(self, start=0):
+        """Float32 copy of the samples captured so far, from `start` on"""
+        return self.buffer.to_float32(start)
+
+    def stop_recording(self, trace=None):
+        if not self.recording or not self.stream:
+            print("Stop recording called but not recording or no stream")
+            return None
+
+        print(f"Stopping recording... samples so far: {len(self.buffer)}")
+        # Waits out any in-flight callback; no sleep needed
+        with self._lock:
+            self._capturing.clear()
+            self.recording = False
+            self.last_stats = self.stats
+
+        if not self.preroll_enabled:
+            try:
+                with span(trace, "stream_stop"):
+                    self.stream.stop_stream()
+            except Exception as e:
+                print(f"Error stopping stream: {e}")
+
+        print(f"📊 Capture: {self.last_stats}")
+        if not len(self.buffer):
+            print("❌ No audio frames recorded!")
             return None
 
+        print(f"📊 Total samples captured: {len(self.buffer)} (buffer capacity {self.buffer.capacity})")
+
+        # Hand Whisper float32 samples directly: no WAV file, no ffmpeg decode
+        with span(trace, "capture_copy"):
+            audio = self.captured_audio()
+        print(f"✅ Captured {len(audio) / self.fs:.2f}s of audio")
+        return audio
+
     def __del__(self):
         # Don't cleanup aggressively in destructor to avoid segfaults
         pass
@@ -237,28 +702,37 @@ class SpeechToTextApp(QMainWindow):
     key_detected_signal = pyqtSignal(str)
     hotkey_triggered_signal = pyqtSignal(str)
     hotkey_released_signal = pyqtSignal(str)
+    cancel_requested_signal = pyqtSignal()
 
     def __init__(self):
         super().__init__()
         self.recorder = AudioRecorder()
         self.is_recording = False
-        self.current_model = "base"
+        self.current_model = DEFAULT_MODEL
         self.whisper_thread = None
+        self.streaming_thread = None
+        self.window_thread = None
+        self.finishing_streams = []
+        self.streaming_enabled = get_setting("streaming_transcription")
+        self.preload_threads = []
+        self.model_loading = False
         self.hotkey_listener = None
         self._cleanup_done = False
 
         # Track modifier keys manually
         self.pressed_modifiers = set()
         self.hotkey_recording = False  # Track if recording was started by hotkey
+        # perf_counter() of the latest key event, where an utterance's latency starts
+        self.last_key_event = None
 
         # Available Whisper models
-        self.models = {
-            "tiny": "Fastest, least accurate",
-            "base": "Good balance of speed and accuracy",
-            "small": "Better accuracy, slower",
-            "medium": "High accuracy, much slower",
-            "large": "Best accuracy, very slow"
-        }
+        self.models = dict(MODELS)
+        self.models[AUTO_MODEL] = "Pick per recording to fit the latency budget"
+        # Languages that can be pinned from the UI; any Whisper code works in settings.json
+        self.languages = {"en": "English", "de": "German", "fr": "French", "es": "Spanish",
+                          "it": "Italian", "pt": "Portuguese", "nl": "Dutch", "ja": "Japanese",
+                          "zh": "Chinese"}
+        self.preload_target = None
 
         self.init_ui()
         self.init_system_tray()
@@ -268,6 +742,39 @@ class SpeechToTextApp(QMainWindow):
         self.key_detected_signal.connect(self.on_key_detected)
         self.hotkey_triggered_signal.connect(self.on_hotkey_triggered)
         self.hotkey_released_signal.connect(self.on_hotkey_released)
+        self.cancel_requested_signal.connect(self.cancel_transcription)
+
+        # Utterances are numbered when they're handed off and pasted strictly in
+        # that order, even if a live-mode result finishes before a queued one
+        self.next_seq = 0
+        self.next_delivery = 0
+        self.outstanding = set()
+        self.finished_results = {}
+        self.delivery_queue = deque()
+        self.delivering = False
+        self.last_delivered = None
+
+        # Per-stage latency: the recording's trace, then one per utterance until it's pasted
+        self.trace = None
+        self.recording_started_at = None
+        self.traces = {}
+        self.paste_trace = None
+        self.paste_scheduled_at = None
+
+        # One persistent worker decodes utterances in FIFO order, so the next
+        # recording overlaps with decoding the previous one
+        self.whisper_thread = WhisperProcessor()
+        self.whisper_thread.transcription_ready.connect(self.on_transcription_ready)
+        self.whisper_thread.transcription_cancelled.connect(self.on_transcription_cancelled)
+        self.whisper_thread.processing_finished.connect(self.on_processing_finished)
+        self.whisper_thread.refinement_ready.connect(self.on_refinement_ready)
+        self.whisper_thread.language_detected.connect(self.on_language_detected)
+        self.whisper_thread.start()
+
+        # Load and warm up the default model before the first dictation
+        self.preload_model()
+        if self.two_pass_checkbox.isChecked():
+            self.preload_draft_model()
 
     def init_ui(self):
         self.setWindowTitle("Local Speech-to-Text")
@@ -287,8 +794,64 @@ class SpeechToTextApp(QMainWindow):
         self.model_combo.setCurrentText("Base - Good balance of speed and accuracy")
         self.model_combo.currentTextChanged.connect(self.on_model_changed)
         model_layout.addWidget(self.model_combo)
+
+        # Decoding profile: how much re-decoding and beam search to spend per utterance
+        self.profile_combo = QComboBox()
+        for profile in DECODING_PROFILES:
+            self.profile_combo.addItem(profile.title(), profile)
+        self.profile_combo.setToolTip("Fast: greedy, never re-decodes. Balanced: up to 3 attempts. "
+                                      "Accurate: beam search, up to 6 attempts")
+        self.profile_combo.setCurrentIndex(max(0, self.profile_combo.findData(get_setting("decoding_profile"))))
+        self.profile_combo.currentIndexChanged.connect(self.on_profile_changed)
+        model_layout.addWidget(self.profile_combo)
+
+        # Dynamically quantized INT8 weights on CPU: faster and smaller than FP32
+        self.int8_checkbox = QCheckBox("INT8 (CPU)")
+        self.int8_checkbox.setToolTip("Quantize Linear layers to INT8; quantized weights are cached on disk")
+        self.int8_checkbox.setChecked(get_setting("int8_quantization"))
+        self.int8_checkbox.toggled.connect(self.on_int8_toggled)
+        model_layout.addWidget(self.int8_checkbox)
         layout.addLayout(model_layout)
 
+        # A known language skips Whisper's per-utterance detection pass
+        language_layout = QHBoxLayout()
+        language_layout.addWidget(QLabel("Language:"))
+        self.language_combo = QComboBox()
+        self.language_combo.addItem("Detect every recording", ("auto", None))
+        self.language_combo.addItem("Detect once, then keep it", ("sticky", None))
+        for code, name in self.languages.items():
+            self.language_combo.addItem(name, ("fixed", code))
+        self.language_combo.setToolTip("English uses the faster English-only models (tiny.en ... medium.en)")
+        mode = get_language_policy().mode
+        for i in range(self.language_combo.count()):
+            item_mode, code = self.language_combo.itemData(i)
+            if item_mode == mode and (mode != "fixed" or code == get_setting("language")):
+                self.language_combo.setCurrentIndex(i)
+                break
+        self.language_combo.currentIndexChanged.connect(self.on_language_changed)
+        language_layout.addWidget(self.language_combo)
+        layout.addLayout(language_layout)
+
+        # Live partial transcription while recording
+        self.streaming_checkbox = QCheckBox("Live transcription while recording")
+        self.streaming_checkbox.setChecked(self.streaming_enabled)
+        self.streaming_checkbox.toggled.connect(self.on_streaming_toggled)
+        layout.addWidget(self.streaming_checkbox)
+
+        # Paste a fast draft right away, then swap in the selected model's text
+        self.two_pass_checkbox = QCheckBox(f"Instant draft with {get_setting('draft_model')}, then refine")
+        self.two_pass_checkbox.setToolTip("The refined text replaces the draft in the window and clipboard")
+        self.two_pass_checkbox.setChecked(get_setting("two_pass"))
+        self.two_pass_checkbox.toggled.connect(self.on_two_pass_toggled)
+        layout.addWidget(self.two_pass_checkbox)
+
+        # Always-open microphone so recordings start instantly with pre-roll
+        self.preroll_checkbox = QCheckBox("Keep microphone open (instant start, keeps last 0.5s)")
+        self.preroll_checkbox.setToolTip("The input stream stays open while the app runs")
+        self.preroll_checkbox.setChecked(get_setting("preroll_enabled") and self.recorder.set_preroll(True))
+        self.preroll_checkbox.toggled.connect(self.on_preroll_toggled)
+        layout.addWidget(self.preroll_checkbox)
+
         # Status
         self.status_label = QLabel("Ready. Try: Option+Space, Cmd+Space, F1, or 'Test Recording' button")
         self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -299,6 +862,19 @@ class SpeechToTextApp(QMainWindow):
         self.progress_bar.setVisible(False)
         layout.addWidget(self.progress_bar)
 
+        # Pending transcriptions
+        self.queue_label = QLabel("")
+        self.queue_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.queue_label.setStyleSheet("color: gray; font-size: 10px;")
+        self.queue_label.setVisible(False)
+        layout.addWidget(self.queue_label)
+
+        # Abort a transcription started by mistake (Esc does the same)
+        self.cancel_button = QPushButton("Cancel Transcription (Esc)")
+        self.cancel_button.clicked.connect(self.cancel_transcription)
+        self.cancel_button.setEnabled(False)
+        layout.addWidget(self.cancel_button)
+
         # Manual record button for testing
         self.record_button = QPushButton("Test Recording (Click & Hold)")
         self.record_button.pressed.connect(self.start_manual_recording)
@@ -340,7 +916,7 @@ class SpeechToTextApp(QMainWindow):
         layout.addWidget(self.copy_button)
 
         # Debug info
-        debug_label = QLabel("Debug: ffmpeg ✅, PyAudio ✅, Fixed segfault ✅")
+        debug_label = QLabel("Debug: In-memory audio ✅, PyAudio ✅, Fixed segfault ✅")
         debug_label.setStyleSheet("color: green; font-size: 9px;")
         layout.addWidget(debug_label)
 
@@ -373,6 +949,15 @@ class SpeechToTextApp(QMainWindow):
         show_action.triggered.connect(self.show)
         tray_menu.addAction(show_action)
 
+        latency_action = QAction("Latency Stats", self)
+        latency_action.triggered.connect(self.show_latency_stats)
+        tray_menu.addAction(latency_action)
+
+        self.cancel_action = QAction("Cancel Transcription", self)
+        self.cancel_action.triggered.connect(self.cancel_transcription)
+        self.cancel_action.setEnabled(False)
+        tray_menu.addAction(self.cancel_action)
+
         quit_action = QAction("Quit", self)
         quit_action.triggered.connect(self.quit_app)
         tray_menu.addAction(quit_action)
@@ -410,14 +995,15 @@ class SpeechToTextApp(QMainWindow):
     def on_hotkey_triggered(self, hotkey_name):
         """Handle hotkey trigger signal (thread-safe)"""
         self.status_label.setText(f"🎯 {hotkey_name} detected! Recording...")
-        self.start_recording()
+        self.start_recording(self.last_key_event)
 
     def on_hotkey_released(self, hotkey_name):
         """Handle hotkey release signal (thread-safe)"""
         self.status_label.setText(f"🎯 {hotkey_name} released! Recording stopped")
-        self.stop_recording()
+        self.stop_recording(self.last_key_event)
 
     def on_key_press(self, key):
+        self.last_key_event = time.perf_counter()
         # Debug: Show all key presses (emit signal instead of direct UI update)
         try:
             key_info = f"KEY PRESS: {key}"
@@ -446,6 +1032,11 @@ class SpeechToTextApp(QMainWindow):
                 self.pressed_modifiers.add('ctrl')
                 print(f"Added ctrl to modifiers: {self.pressed_modifiers}")
 
+            # Esc aborts the running transcription
+            if key == keyboard.Key.esc:
+                self.cancel_requested_signal.emit()
+                return
+
             # Check for hotkey combinations
             # Method 1: Fn key (hardware level)
             if hasattr(key, 'vk') and key.vk == 179:  # Fn key virtual key code
@@ -494,6 +1085,7 @@ class SpeechToTextApp(QMainWindow):
             print(f"Hotkey detection error: {e}")
 
     def on_key_release(self, key):
+        self.last_key_event = time.perf_counter()
         # Debug: Show all key releases
         try:
             key_info = f"KEY RELEASE: {key}"
@@ -534,15 +1126,129 @@ class SpeechToTextApp(QMainWindow):
         if current_data:
             self.current_model = current_data
             print(f"Model changed to: {self.current_model}")
+            self.preload_model()
+
+    def on_profile_changed(self):
+        profile = self.profile_combo.currentData()
+        set_setting("decoding_profile", profile)
+        # Queued jobs pick up the new profile when they start
+        print(f"Decoding profile changed to: {profile}")
+
+    def on_int8_toggled(self, checked):
+        set_setting("int8_quantization", checked)
+        print(f"INT8 quantized inference {'enabled' if checked else 'disabled'}")
+        # Queued jobs pick up the new precision when they start
+        self.preload_model()
+
+    def on_language_changed(self):
+        mode, code = self.language_combo.currentData()
+        set_setting("language_mode", mode)
+        if code:
+            set_setting("language", code)
+        get_language_policy().reset()
+        print(f"Language: {mode}{f' ({code})' if code else ''}")
+        # Pinning English swaps in the .en checkpoint, so load it now
+        self.preload_model()
+
+    def on_language_detected(self, language):
+        if language == "en":
+            self.preload_model()
+
+    def on_two_pass_toggled(self, checked):
+        set_setting("two_pass", checked)
+        if checked:
+            self.preload_draft_model()
+
+    def preload_draft_model(self):
+        """Warm the draft model too so the first draft isn't a cold load"""
+        preloader = ModelPreloader(get_setting("draft_model"))
+        preloader.finished.connect(lambda: self.preload_threads.remove(preloader))
+        self.preload_threads.append(preloader)
+        preloader.start()
+
+    def on_streaming_toggled(self, checked):
+        self.streaming_enabled = checked
+        set_setting("streaming_transcription", checked)
+        print(f"Live transcription {'enabled' if checked else 'disabled'}")
+
+    def on_preroll_toggled(self, checked):
+        if not self.recorder.set_preroll(checked):
+            # Couldn't switch (recording in progress or no microphone)
+            self.preroll_checkbox.blockSignals(True)
+            self.preroll_checkbox.setChecked(self.recorder.preroll_enabled)
+            self.preroll_checkbox.blockSignals(False)
+            return
+        set_setting("preroll_enabled", checked)
+
+    def resolve_model(self, audio_seconds=5.0, budget=None):
+        """The concrete model "auto" would pick for a typical utterance"""
+        if self.current_model != AUTO_MODEL:
+            return self.current_model
+        return choose_model(audio_seconds, budget)
+
+    def preload_model(self):
+        """Load and warm up the current model on a background thread"""
+        model_size = self.resolve_model()
+        self.preload_target = model_size
+        self.model_loading = True
+        self.tray_icon.setToolTip(f"Whisper: loading {model_size} model...")
+        if not self.is_busy():
+            self.status_label.setText(f"⏳ Loading {model_size} model...")
+            self.status_label.setStyleSheet("color: orange;")
+
+        preloader = ModelPreloader(model_size)
+        preloader.model_ready.connect(self.on_model_ready)
+        preloader.preload_failed.connect(self.on_model_preload_failed)
+        preloader.finished.connect(lambda: self.preload_threads.remove(preloader))
+        self.preload_threads.append(preloader)
+        preloader.start()
+
+    def on_model_ready(self, model_size):
+        print(f"✅ Model ready: {model_size}")
+        if model_size != self.preload_target:
+            return
+        self.model_loading = False
+        self.tray_icon.setToolTip(f"Whisper: {model_size} model ready")
+        if not self.is_busy():
+            self.status_label.setText(f"✅ {model_size.title()} model ready. {self.ready_message()}")
+            self.status_label.setStyleSheet("color: black; font-weight: normal;")
+
+    def on_model_preload_failed(self, model_size, error):
+        if model_size != self.preload_target:
+            return
+        self.model_loading = False
+        self.tray_icon.setToolTip(f"Whisper: failed to load {model_size} model")
+        if not self.is_busy():
+            self.status_label.setText(f"❌ Could not load {model_size} model: {error}")
+            self.status_label.setStyleSheet("color: red;")
+
+    def is_busy(self):
+        """True while recording or transcribing"""
+        return self.is_recording or bool(self.outstanding)
+
+    def ready_message(self):
+        if PYNPUT_AVAILABLE and self.hotkey_listener:
+            return "Try: Option+Space, Cmd+Space, F1, or 'Test Recording' button"
+        return "Use 'Test Recording' button."
 
-    def start_recording(self):
+    def start_recording(self, key_event_at=None):
         if self.is_recording:
             print("Already recording, ignoring start request")
             return
 
         print(f"Starting recording... (hotkey_recording={self.hotkey_recording})")
-        success = self.recorder.start_recording()
+        # The utterance's clock starts at the key press (or now for the button)
+        trace = get_latency_tracker().begin(key_event_at)
+        if key_event_at is not None:
+            trace.add("hotkey_dispatch", key_event_at)
+        # Live mode decodes raw windows, so only queued jobs use the capture-time mel
+        mel_model = get_setting("draft_model") if self.two_pass_checkbox.isChecked() else self.resolve_model()
+        with trace.span("mel_setup"):
+            self.recorder.set_mel_bins(None if self.streaming_enabled else model_n_mels(mel_model))
+        success = self.recorder.start_recording(trace)
         if success:
+            self.trace = trace
+            self.recording_started_at = time.perf_counter()
             self.is_recording = True
             if self.hotkey_recording:
                 self.status_label.setText("🔴 Recording... (Hold hotkey to continue)")
@@ -550,45 +1256,134 @@ class SpeechToTextApp(QMainWindow):
                 self.status_label.setText("🔴 Recording... (Release button to stop)")
             self.status_label.setStyleSheet("color: red; font-weight: bold;")
             print("✅ Recording started successfully")
+
+            if self.streaming_enabled:
+                # Live passes come once a second, so "auto" has to fit a pass in that
+                self.streaming_thread = StreamingTranscriber(self.recorder, self.resolve_model(budget=1.0))
+                self.streaming_thread.partial_transcription.connect(self.on_partial_transcription)
+                self.streaming_thread.transcription_ready.connect(self.on_transcription_ready)
+                self.streaming_thread.transcription_cancelled.connect(self.on_transcription_cancelled)
+                self.streaming_thread.processing_finished.connect(self.on_processing_finished)
+                self.streaming_thread.start()
+            elif get_setting("background_windows"):
+                # Windows must keep up with the recording, so "auto" gets real time per window
+                self.window_thread = WindowedTranscriber(self.recorder,
+                                                         self.resolve_model(audio_seconds=30.0, budget=30.0))
+                self.window_thread.transcription_ready.connect(self.on_transcription_ready)
+                self.window_thread.transcription_cancelled.connect(self.on_transcription_cancelled)
+                self.window_thread.processing_finished.connect(self.on_processing_finished)
+                self.window_thread.start()
         else:
             self.status_label.setText("❌ Recording failed - check microphone")
             self.status_label.setStyleSheet("color: red;")
             print("❌ Recording failed to start")
 
-    def stop_recording(self):
+    def stop_recording(self, key_event_at=None):
         if not self.is_recording:
             print("Not recording, ignoring stop request")
             return
 
+        released_at = time.perf_counter() if key_event_at is None else key_event_at
+        trace = self.trace
+        self.trace = None
+        trace.add("recording", self.recording_started_at, released_at)
+        # Latency after release is what the user waits for
+        trace.add("release", released_at, released_at)
+        if key_event_at is not None:
+            trace.add("release_dispatch", key_event_at)
+
         print(f"Stopping recording... (hotkey_recording={self.hotkey_recording})")
         self.is_recording = False
         self.hotkey_recording = False  # Reset hotkey recording flag
-        self.status_label.setText("⏳ Processing...")
+        if self.model_loading:
+            # The job waits in the model cache for the preload to finish
+            self.status_label.setText(f"⏳ Waiting for {self.current_model} model to load...")
+        else:
+            self.status_label.setText("⏳ Processing...")
         self.status_label.setStyleSheet("color: orange;")
         self.progress_bar.setVisible(True)
         self.progress_bar.setRange(0, 0)  # Indeterminate progress
 
-        # Stop recording and get audio file
-        audio_file = self.recorder.stop_recording()
-
-        print(f"Audio file path: {audio_file}")
-
-        if audio_file:
-            # Clean up any existing thread gently
-            if self.whisper_thread and self.whisper_thread.isRunning():
-                self.whisper_thread.quit()
-                self.whisper_thread.wait(1000)  # Wait max 1 second
-                self.whisper_thread.cleanup()
-
-            # Process with Whisper in background thread
-            self.whisper_thread = WhisperProcessor(audio_file, self.current_model)
-            self.whisper_thread.transcription_ready.connect(self.on_transcription_ready)
-            self.whisper_thread.processing_finished.connect(self.on_processing_finished)
-            self.whisper_thread.start()
-            print("🎯 Started Whisper processing thread")
-        else:
-            print("❌ No audio file generated")
-            self.on_processing_finished()
+        # Stop recording and get the captured samples
+        audio = self.recorder.stop_recording(trace)
+        audio_start = 0
+
+        # A dictation long enough to fill a window finishes on the background
+        # worker; shorter ones go through the queue like any other
+        windowed = self.window_thread
+        self.window_thread = None
+        if windowed and not windowed.started:
+            self.hand_off(windowed)
+            windowed.finish(None)
+            windowed = None
+        stream = self.streaming_thread or windowed
+        self.streaming_thread = None
+        no_speech = False
+        status_notes = []
+
+        # Surface capture starvation (e.g. CPU pinned by inference)
+        stats = self.recorder.last_stats
+        if stats and (stats.overflows or stats.dropped_frames):
+            print(f"⚠️ Audio capture lost data: {stats}")
+            status_notes.append(f"⚠️ {stats.overflows} input overflows, ~{stats.dropped_frames} frames dropped")
+
+        if audio is not None and len(audio) and get_setting("vad_enabled"):
+            with trace.span("vad"):
+                vad = trim_silence(audio, self.recorder.fs)
+            print(f"🔇 VAD removed {vad.removed_seconds:.2f}s of {len(audio) / self.recorder.fs:.2f}s")
+            if not vad.has_speech:
+                print("🤫 No speech detected, skipping transcription")
+                audio = None
+                no_speech = True
+            elif not stream:
+                # Live and windowed modes keep the untrimmed timeline their commits refer to
+                audio = vad.audio
+                audio_start = vad.start
+                if vad.removed_seconds >= 0.1:
+                    status_notes.append(f"trimmed {vad.removed_seconds:.1f}s of silence")
+
+        if status_notes:
+            self.status_label.setText(f"{self.status_label.text()} ({', '.join(status_notes)})")
+
+        has_audio = audio is not None and len(audio) > 0
+        if stream:
+            # Live and windowed modes only decode the audio after their last commit
+            self.hand_off(stream)
+            if has_audio:
+                stream.finish(audio, self.take_sequence_number(trace))
+            else:
+                stream.finish(None)
+            print(f"🎯 Finishing {'windowed' if stream is windowed else 'live'} transcription")
+        elif has_audio:
+            # Queue behind any utterance still being transcribed
+            draft_model = get_setting("draft_model") if self.two_pass_checkbox.isChecked() else None
+            if draft_model == self.current_model:
+                draft_model = None
+            with trace.span("mel_finish"):
+                mel = self.recorder.log_mel(audio, audio_start)
+            self.whisper_thread.submit(TranscriptionJob(self.take_sequence_number(trace), audio,
+                                                        self.current_model, draft_model, mel, trace))
+            print(f"🎯 Queued utterance for transcription ({len(self.outstanding)} pending)")
+
+        if not has_audio:
+            print("❌ No speech to transcribe")
+        self.update_queue_status()
+        if not has_audio and no_speech:
+            self.status_label.setText("🤫 No speech detected, nothing transcribed")
+
+    def hand_off(self, stream):
+        """Keep a finishing live or windowed worker around until its thread exits"""
+        self.finishing_streams.append(stream)
+        stream.finished.connect(lambda: self.finishing_streams.remove(stream))
+
+    def take_sequence_number(self, trace=None):
+        seq = self.next_seq
+        self.next_seq += 1
+        self.outstanding.add(seq)
+        if trace:
+            trace.utterance = seq
+            self.traces[seq] = trace
+        return seq
 
     def start_manual_recording(self):
         self.start_recording()
@@ -596,14 +1391,49 @@ class SpeechToTextApp(QMainWindow):
     def stop_manual_recording(self):
         self.stop_recording()
 
-    def on_transcription_ready(self, text):
-        print(f"Transcription ready: {text}")
-        self.transcription_display.setText(text)
-        self.copy_button.setEnabled(True)
+    def on_partial_transcription(self, committed, tentative):
+        """Show committed text normally and the unstable tail greyed out"""
+        self.transcription_display.setHtml(
+            f"{html.escape(committed)} <span style='color: gray;'>{html.escape(tentative)}</span>")
+
+    def on_transcription_ready(self, seq, text):
+        print(f"Transcription #{seq} ready: {text}")
+        self.finished_results[seq] = text
+        trace = self.traces.get(seq)
+        if trace:
+            trace.mark("result_ready")
+            if not text:
+                # Cancelled or silent: nothing will be pasted
+                del self.traces[seq]
+
+        # Hold results back until every earlier utterance has been delivered
+        while self.next_delivery in self.finished_results:
+            ready = self.finished_results.pop(self.next_delivery)
+            self.next_delivery += 1
+            if ready:
+                self.delivery_queue.append((self.next_delivery - 1, ready))
+        self.deliver_next()
+
+    def deliver_next(self):
+        """Show, copy and paste the next result; one at a time so pastes don't race"""
+        if self.delivering or not self.delivery_queue:
+            return
+        self.delivering = True
+        seq, text = self.delivery_queue.popleft()
+        self.last_delivered = (seq, text)
+        trace = self.traces.pop(seq, None)
+        if trace and trace.last("result_ready") is not None:
+            # Time spent waiting for earlier utterances to be pasted first
+            trace.add("delivery_wait", trace.last("result_ready"))
+
+        with span(trace, "display"):
+            self.transcription_display.setText(text)
+            self.copy_button.setEnabled(True)
 
         # Auto-copy to clipboard and try to paste to active window
         try:
-            pyperclip.copy(text)
+            with span(trace, "clipboard"):
+                pyperclip.copy(text)
             print("Text copied to clipboard")
         except Exception as e:
             print(f"Clipboard error: {e}")
@@ -611,13 +1441,71 @@ class SpeechToTextApp(QMainWindow):
         # Try to paste to active window (this is the advanced feature)
         try:
             # Minimize our window to get back to the original app
-            self.showMinimized()
+            with span(trace, "minimize"):
+                self.showMinimized()
 
             # Small delay to ensure window switching
-            QTimer.singleShot(100, self.paste_to_active_window)
+            self.paste_trace = trace
+            self.paste_scheduled_at = time.perf_counter()
+            QTimer.singleShot(100, self.paste_and_continue)
 
         except Exception as e:
             print(f"Auto-paste error: {e}")
+            self.delivering = False
+            if trace:
+                get_latency_tracker().finish(trace)
+
+    def on_refinement_ready(self, seq, text, draft_seconds, refine_seconds):
+        """Swap the refined text in for a draft, unless a newer utterance replaced it"""
+        print(f"Refinement #{seq}: draft {draft_seconds:.2f}s, refined {refine_seconds:.2f}s")
+        if not self.is_busy():
+            self.status_label.setText(f"⚡ Draft in {draft_seconds:.1f}s, refined in {refine_seconds:.1f}s")
+
+        # Not delivered yet: the refined text goes out in the draft's place
+        if seq in self.finished_results:
+            self.finished_results[seq] = text
+            return
+        for i, (queued_seq, _) in enumerate(self.delivery_queue):
+            if queued_seq == seq:
+                self.delivery_queue[i] = (seq, text)
+                return
+
+        if not self.last_delivered or self.last_delivered[0] != seq:
+            print(f"Refinement #{seq} arrived after a newer transcription, keeping that")
+            return
+        draft = self.last_delivered[1]
+        if not text or text == draft:
+            return
+        self.last_delivered = (seq, text)
+        self.transcription_display.setText(text)
+        try:
+            # Leave the clipboard alone if something else was copied meanwhile
+            if pyperclip.paste() == draft:
+                pyperclip.copy(text)
+                print("Refined text copied to clipboard")
+        except Exception as e:
+            print(f"Clipboard error: {e}")
+
+    def paste_and_continue(self):
+        trace = self.paste_trace
+        self.paste_trace = None
+        if trace:
+            trace.add("paste_delay", self.paste_scheduled_at)
+        with span(trace, "paste"):
+            self.paste_to_active_window()
+        if trace:
+            get_latency_tracker().finish(trace)
+        self.delivering = False
+        self.deliver_next()
+
+    def show_latency_stats(self):
+        """Rolling per-stage percentiles of the recent utterances"""
+        report = get_latency_tracker().report()
+        print(report)
+        box = QMessageBox(self)
+        box.setWindowTitle("Latency Stats")
+        box.setText(f"<pre>{html.escape(report)}</pre>")
+        box.show()
 
     def paste_to_active_window(self):
         """Attempt to paste transcribed text to the currently active text field"""
@@ -637,27 +1525,55 @@ class SpeechToTextApp(QMainWindow):
         except Exception as e:
             print(f"Paste error: {e}")
 
-    def on_processing_finished(self):
-        print("Processing finished")
+    def cancel_transcription(self):
+        """Abort whatever is decoding now; later utterances keep their place"""
+        if not self.outstanding:
+            return
+        cancelled = self.whisper_thread.cancel_current()
+        for stream in self.finishing_streams:
+            stream.cancel()
+            cancelled = True
+        if cancelled:
+            print("🛑 Cancelling transcription")
+            self.status_label.setText("🛑 Cancelling transcription...")
+
+    def on_transcription_cancelled(self, seq):
+        print(f"Transcription #{seq} cancelled")
+        if self.is_recording:
+            return
+        if self.outstanding:
+            self.status_label.setText("🛑 Transcription cancelled, continuing with the queue...")
+            return
+        self.status_label.setText(f"🛑 Transcription cancelled. {self.ready_message()}")
+        self.status_label.setStyleSheet("color: black; font-weight: normal;")
+
+    def on_processing_finished(self, seq):
+        print(f"Processing #{seq} finished")
+        self.outstanding.discard(seq)
+        self.update_queue_status()
+
+    def update_queue_status(self):
+        """Show queue depth while work is pending, otherwise go back to ready"""
+        pending = len(self.outstanding)
+        self.queue_label.setVisible(pending > 0)
+        self.queue_label.setText(f"📥 {pending} utterance{'s' if pending != 1 else ''} in transcription queue")
+        self.cancel_button.setEnabled(pending > 0)
+        self.cancel_action.setEnabled(pending > 0)
+        self.tray_icon.setToolTip(f"Whisper: {pending} pending" if pending else f"Whisper: {self.current_model} model")
+        if pending:
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 0)  # Indeterminate progress
+            return
+
         self.progress_bar.setVisible(False)
+        if self.is_recording:
+            return
 
         # Update status based on whether hotkeys are available
-        if PYNPUT_AVAILABLE and self.hotkey_listener:
-            self.status_label.setText("Ready. Try: Option+Space, Cmd+Space, F1, or 'Test Recording' button")
-        else:
-            self.status_label.setText("Ready. Use 'Test Recording' button.")
+        self.status_label.setText(f"Ready. {self.ready_message()}")
 
         self.status_label.setStyleSheet("color: black; font-weight: normal;")
 
-        # Clean up temporary audio file and thread
-        if self.whisper_thread:
-            if hasattr(self.whisper_thread, 'audio_file'):
-                try:
-                    os.unlink(self.whisper_thread.audio_file)
-                    print(f"Cleaned up temp file: {self.whisper_thread.audio_file}")
-                except:
-                    pass
-
     def copy_transcription(self):
         text = self.transcription_display.toPlainText()
         if text:
@@ -705,12 +1621,23 @@ class SpeechToTextApp(QMainWindow):
                 except:
                     pass
 
-            # Wait for whisper thread to finish naturally
+            for stream in (self.streaming_thread, self.window_thread):
+                if stream:
+                    stream.finish(None)
+                    stream.wait(2000)
+            for stream in list(self.finishing_streams):
+                stream.wait(2000)
+
+            # Let the worker finish its current job, then stop
             if hasattr(self, 'whisper_thread') and self.whisper_thread:
                 if self.whisper_thread.isRunning():
-                    self.whisper_thread.quit()
+                    self.whisper_thread.cleanup()
                     self.whisper_thread.wait(2000)  # Wait max 2 seconds
 
+            for preloader in list(self.preload_threads):
+                if preloader.isRunning():
+                    preloader.wait(2000)
+
             # Don't aggressively cleanup audio recorder - let Python GC handle it
 
             self._cleanup_done = True
@@ -782,6 +1709,10 @@ def main():
     # Register global cleanup
     atexit.register(cleanup_global)
 
+    # Inter-op threads can only be set before torch does any parallel work
+    intra, inter = apply_thread_settings(DEFAULT_MODEL)
+    print(f"Torch threads: {intra} intra-op, {inter} inter-op")
+
     app = QApplication(sys.argv)
 
     # Check if system tray is available
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+
+# Streaming log-mel frontend. Frames are computed from the capture buffer while
+# the key is held, so at release only the edge frames and Whisper's global
+# dynamic-range clamp are left. The output matches
+# whisper.log_mel_spectrogram(audio, n_mels, padding=N_SAMPLES), which is what
+# model.transcribe computes.
+
+import os
+import threading
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+N_FFT = 400
+HOP_LENGTH = 160
+N_SAMPLES = 30 * SAMPLE_RATE
+# torch.stft(center=True) centres frame t on sample t * HOP_LENGTH
+HALF_WINDOW = N_FFT // 2
+# log10 of the 1e-10 floor: frames that only see the zero padding
+SILENT_LOG_MEL = -10.0
+
+def load_mel_filters(n_mels=80):
+    """The librosa mel filterbank Whisper ships, as (n_mels, N_FFT // 2 + 1)"""
+    import whisper
+    path = os.path.join(os.path.dirname(whisper.audio.__file__), "assets", "mel_filters.npz")
+    with np.load(path, allow_pickle=False) as f:
+        return f[f"mel_{n_mels}"].astype(np.float32)
+
+def hann_window():
+    # Periodic, like torch.hann_window's default
+    return (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+
+def frame_log_mel(frames, filters, window):
+    """Unnormalized log10 mel energies of (n, N_FFT) frames, as (n, n_mels)"""
+    spectrum = np.fft.rfft(frames * window, axis=-1)
+    power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+    return np.log10(np.maximum(power @ filters.T, 1e-10))
+
+def normalize_log_mel(log_mel):
+    """Whisper's dynamic-range clamp and scaling over the whole (frames, n_mels) array"""
+    log_mel = np.maximum(log_mel, log_mel.max() - 8.0)
+    return ((log_mel + 4.0) / 4.0).T.astype(np.float32)
+
+def _frames(samples, first, count):
+    """count frames of N_FFT samples, HOP_LENGTH apart, starting at first"""
+    windows = np.lib.stride_tricks.sliding_window_view(samples[first:first + (count - 1) * HOP_LENGTH + N_FFT], N_FFT)
+    return windows[::HOP_LENGTH]
+
+def log_mel_spectrogram(audio, n_mels=80, filters=None):
+    """Reference one-shot computation, padded with N_SAMPLES of silence"""
+    filters = load_mel_filters(n_mels) if filters is None else filters
+    padded = np.pad(np.concatenate((audio, np.zeros(N_SAMPLES, dtype=np.float32))), HALF_WINDOW, mode="reflect")
+    n_frames = (len(audio) + N_SAMPLES) // HOP_LENGTH
+    return normalize_log_mel(frame_log_mel(_frames(padded, 0, n_frames), filters, hann_window()))
+
+class StreamingLogMel:
+    """Computes log-mel frames as samples arrive in a CaptureBuffer
+
+    Frame g is kept once its whole window [g * HOP - 200, g * HOP + 200) has
+    been captured. finish() reuses those frames for the final (possibly
+    trimmed) audio and computes only the frames that touch its edges, where
+    Whisper reflects at the start and pads with zeros at the end.
+    """
+
+    def __init__(self, n_mels=80, filters=None):
+        self.n_mels = n_mels
+        self.filters = load_mel_filters(n_mels) if filters is None else filters
+        self.window = hann_window()
+        self._blocks = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._blocks = []
+            # Frames 0 and 1 reach before the first sample
+            self._next = -(-HALF_WINDOW // HOP_LENGTH)
+
+    def advance(self, buffer):
+        """Compute every frame whose window is fully inside the captured samples"""
+        with self._lock:
+            last = (len(buffer) - HALF_WINDOW) // HOP_LENGTH
+            count = last - self._next + 1
+            if count <= 0:
+                return 0
+            start = self._next * HOP_LENGTH - HALF_WINDOW
+            samples = buffer.to_float32(start, last * HOP_LENGTH + HALF_WINDOW)
+            self._blocks.append(frame_log_mel(_frames(samples, 0, count), self.filters, self.window))
+            self._next = last + 1
+            return count
+
+    def finish(self, audio, start=0):
+        """Normalized log-mel of audio == captured[start:start + len(audio)]
+
+        Same result as log_mel_spectrogram(audio); computed frames are reused
+        when start falls on a hop boundary.
+        """
+        n_frames = (len(audio) + N_SAMPLES) // HOP_LENGTH
+        log_mel = np.full((n_frames, self.n_mels), SILENT_LOG_MEL, dtype=np.float32)
+
+        # Frames whose window lies inside audio and was already computed
+        first_inner = -(-HALF_WINDOW // HOP_LENGTH)
+        last_inner = (len(audio) - HALF_WINDOW) // HOP_LENGTH
+        reused_end = first_inner
+        with self._lock:
+            if start % HOP_LENGTH == 0 and self._blocks:
+                offset = start // HOP_LENGTH
+                computed = np.concatenate(self._blocks)
+                self._blocks = [computed]
+                # computed[i] is frame first_inner + i of the whole capture
+                reused_end = max(first_inner, min(last_inner + 1, self._next - offset))
+                if reused_end > first_inner:
+                    log_mel[first_inner:reused_end] = computed[offset:offset + reused_end - first_inner]
+
+        # Everything else that sees real samples: the reflected start, the tail
+        # not computed yet, and frames overlapping the zero padding
+        last_audible = min(n_frames - 1, (len(audio) + HALF_WINDOW - 1) // HOP_LENGTH)
+        needed = list(range(min(first_inner, n_frames))) + list(range(reused_end, last_audible + 1))
+        if needed:
+            padded = np.pad(np.concatenate((audio, np.zeros(N_SAMPLES, dtype=np.float32))), HALF_WINDOW, mode="reflect")
+            frames = np.stack([padded[t * HOP_LENGTH:t * HOP_LENGTH + N_FFT] for t in needed])
+            log_mel[needed] = frame_log_mel(frames, self.filters, self.window)
+        return normalize_log_mel(log_mel)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+# Content-addressed cache of transcription results. The key hashes the decoded
+# 16 kHz PCM together with the model key and decoding options, so the same
+# audio is never transcribed twice with the same settings. Entries are JSON
+# files whose modification time doubles as the LRU clock.
+
+import os
+import json
+import hashlib
+import threading
+
+import numpy as np
+
+from settings import get_setting, app_data_dir
+
+class ResultCache:
+    """Size-bounded on-disk LRU cache of full transcribe() results"""
+
+    def __init__(self, directory=None, max_mb=None):
+        if max_mb is None:
+            max_mb = get_setting("result_cache_mb")
+        self.directory = directory or app_data_dir() / "result_cache"
+        self.max_bytes = int(max_mb) * 1024 * 1024
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(audio, model_key, options):
+        """sha256 over the float32 samples, the model key and the decoding options"""
+        digest = hashlib.sha256()
+        digest.update(np.ascontiguousarray(audio, dtype=np.float32).tobytes())
+        digest.update(json.dumps([list(model_key), options], sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: dropping unreadable cached result {path}: {e}")
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return result
+
+    def put(self, key, result):
+        path = self._path(key)
+        try:
+            data = json.dumps(result, ensure_ascii=False,
+                              default=lambda o: o.item() if hasattr(o, "item") else str(o)).encode("utf-8")
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Atomic rename so concurrent readers (e.g. batch workers) never see half a file
+            partial = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.partial")
+            with open(partial, "wb") as f:
+                f.write(data)
+            os.replace(partial, path)
+        except Exception as e:
+            print(f"Warning: could not cache result: {e}")
+            return
+        with self._lock:
+            if self._total_bytes is not None:
+                self._total_bytes += len(data)
+        self._enforce_budget()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _entries(self):
+        entries = []
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def _enforce_budget(self):
+        """Delete least recently used results until the cache fits max_bytes"""
+        with self._lock:
+            # Only rescan the directory once the running total says we're over
+            if self._total_bytes is not None and self._total_bytes <= self.max_bytes:
+                return
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                # Evict down to 90% so the next few puts don't rescan
+                target = self.max_bytes * 0.9
+                for _, size, path in sorted(entries):
+                    if total <= target:
+                        break
+                    self._remove(path)
+                    total -= size
+            self._total_bytes = total
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            self._total_bytes = 0
+
+_result_cache = None
+_result_cache_lock = threading.Lock()
+
+def get_result_cache():
+    """Return the process-wide result cache, or None when it's disabled"""
+    global _result_cache
+    if get_setting("result_cache_mb") <= 0:
+        return None
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ResultCache()
+        return _result_cache
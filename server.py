@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+
+# Local transcription service so a team can share one machine's models.
+#
+#   python server.py --model medium --workers 2 --port 8765
+#
+#   curl --data-binary @clip.wav -H "Content-Type: audio/wav" http://localhost:8765/transcribe
+#   curl --data-binary @clip.pcm -H "Content-Type: audio/L16" "http://localhost:8765/transcribe?rate=16000"
+#
+# Uploads go onto a bounded queue served by worker threads that each keep a
+# model replica resident. When the queue is full the server answers 503 so
+# clients back off instead of piling up latency.
+
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import torch
+
+from settings import get_setting
+from batching import collect_batch, transcribe_batch
+from transcription import (
+    DEFAULT_MODEL, ModelCache, decode_audio_bytes, get_language_policy, model_for_language,
+    pcm16_to_float32, transcribe_audio, warm_up_model
+)
+
+MAX_UPLOAD_BYTES = 100 * 1024 * 1024
+RAW_PCM_TYPES = ("audio/l16", "audio/pcm", "application/octet-stream")
+
+class TranscriptionJob:
+    def __init__(self, audio, model_size, options):
+        self.audio = audio
+        self.model_size = model_size
+        self.options = options
+        self.submitted = time.perf_counter()
+        self.started = None
+        self.finished = None
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+class TranscriptionService:
+    """Bounded job queue drained by workers holding resident models"""
+
+    def __init__(self, model_size=DEFAULT_MODEL, workers=1, queue_size=16,
+                 max_batch=1, max_wait=0.05, threads=None, use_result_cache=True):
+        self.model_size = model_size
+        self.threads = threads
+        self.use_result_cache = use_result_cache
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.workers = []
+        self.completed = 0
+        self.rejected = 0
+        self._stats_lock = threading.Lock()
+        # One cache per worker gives each its own model replica, so workers
+        # don't serialize on a shared model's inference lock. Each cache checks
+        # the whole process's RSS, every replica included, against the full
+        # budget, and none evicts its worker's most recently used model.
+        self.caches = [ModelCache() for _ in range(workers)]
+
+    def start(self):
+        checkpoint = get_language_policy().route(self.model_size)[0]
+        for i, cache in enumerate(self.caches):
+            print(f"Worker {i}: loading {checkpoint}")
+            warm_up_model(checkpoint, cache=cache)
+            worker = threading.Thread(target=self._work, args=(cache,), daemon=True,
+                                      name=f"transcription-worker-{i}")
+            worker.start()
+            self.workers.append(worker)
+        print(f"✅ {len(self.workers)} workers ready")
+
+    def submit(self, audio, model_size=None, options=None):
+        """Queue a job; raises queue.Full when the service is saturated"""
+        model_size = model_size or self.model_size
+        options = dict(options or {})
+        # Same routing as the desktop app: a known language skips detection
+        # and may run the English-only checkpoint
+        if options.get("language"):
+            model_size = model_for_language(model_size, options["language"])
+        else:
+            model_size, options["language"] = get_language_policy().route(model_size)
+        job = TranscriptionJob(audio, model_size, options)
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            with self._stats_lock:
+                self.rejected += 1
+            raise
+        return job
+
+    def _work(self, cache):
+        # torch keeps its intra-op thread count per thread, so each worker
+        # applies it itself rather than inheriting the main thread's
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        while True:
+            if self.max_batch > 1:
+                self._run_batch(cache, collect_batch(self.jobs, self.max_batch, self.max_wait))
+            else:
+                self._run_one(cache, self.jobs.get())
+
+    def _finish(self, job):
+        job.finished = time.perf_counter()
+        with self._stats_lock:
+            self.completed += 1
+        job.done.set()
+        self.jobs.task_done()
+
+    def _run_one(self, cache, job):
+        job.started = time.perf_counter()
+        try:
+            job.result = transcribe_audio(job.audio, job.model_size, cache=cache,
+                                          use_result_cache=self.use_result_cache, **job.options)
+            if job.options["language"] is None:
+                get_language_policy().observe(job.result.get("language"))
+        except Exception as e:
+            print(f"Transcription error: {e}")
+            job.error = str(e)
+        finally:
+            self._finish(job)
+
+    def _run_batch(self, cache, jobs):
+        # Only jobs with the same model and language can share a decode
+        groups = {}
+        for job in jobs:
+            groups.setdefault((job.model_size, job.options.get("language")), []).append(job)
+
+        for (model_size, language), group in groups.items():
+            started = time.perf_counter()
+            for job in group:
+                job.started = started
+            try:
+                results = transcribe_batch([job.audio for job in group], model_size,
+                                           cache=cache, language=language,
+                                           use_result_cache=self.use_result_cache)
+                for job, result in zip(group, results):
+                    job.result = result
+                    if language is None:
+                        get_language_policy().observe(result.get("language"))
+            except Exception as e:
+                print(f"Batch transcription error: {e}")
+                for job in group:
+                    job.error = str(e)
+            finally:
+                for job in group:
+                    self._finish(job)
+
+    def status(self):
+        with self._stats_lock:
+            return {
+                "status": "ok",
+                "model": self.model_size,
+                "workers": len(self.workers),
+                "queue_depth": self.jobs.qsize(),
+                "queue_size": self.jobs.maxsize,
+                "max_batch": self.max_batch,
+                "completed": self.completed,
+                "rejected": self.rejected,
+            }
+
+class TranscriptionRequestHandler(BaseHTTPRequestHandler):
+    service = None
+    allowed_models = ()
+    request_timeout = 600
+
+    def log_message(self, format, *args):
+        print(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self._send_json(200, self.service.status())
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _read_audio(self, params):
+        length = int(self.headers.get("Content-Length", 0))
+        if length <= 0:
+            raise ValueError("empty request body")
+        if length > MAX_UPLOAD_BYTES:
+            raise ValueError(f"upload larger than {MAX_UPLOAD_BYTES} bytes")
+        data = self.rfile.read(length)
+
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip().lower()
+        if content_type in RAW_PCM_TYPES:
+            # Raw little-endian int16 PCM; only 16 kHz is accepted so no resampling
+            rate = int(params.get("rate", ["16000"])[0])
+            channels = int(params.get("channels", ["1"])[0])
+            if rate != 16000:
+                raise ValueError("raw PCM must be 16000 Hz; upload a WAV for other rates")
+            return pcm16_to_float32(data, channels)
+        return decode_audio_bytes(data)
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/transcribe":
+            self._send_json(404, {"error": "not found"})
+            return
+
+        params = parse_qs(url.query)
+        model_size = params.get("model", [self.service.model_size])[0]
+        if model_size not in self.allowed_models:
+            self._send_json(400, {"error": f"model must be one of {list(self.allowed_models)}"})
+            return
+        options = {}
+        if "language" in params:
+            options["language"] = params["language"][0]
+
+        try:
+            audio = self._read_audio(params)
+        except Exception as e:
+            self._send_json(400, {"error": str(e)})
+            return
+
+        try:
+            job = self.service.submit(audio, model_size, options)
+        except queue.Full:
+            self._send_json(503, {"error": "server busy, retry later"}, {"Retry-After": "1"})
+            return
+
+        if not job.done.wait(self.request_timeout):
+            self._send_json(504, {"error": "transcription timed out"})
+            return
+        if job.error:
+            self._send_json(500, {"error": job.error})
+            return
+
+        result = job.result
+        self._send_json(200, {
+            "text": result["text"].strip(),
+            "language": result.get("language"),
+            "segments": [
+                {"start": s["start"], "end": s["end"], "text": s["text"]}
+                for s in result["segments"]
+            ],
+            "model": job.model_size,
+            "cached": bool(result.get("from_cache")),
+            "duration": round(len(audio) / 16000, 3),
+            "queue_wait": round(job.started - job.submitted, 3),
+            "inference_time": round(job.finished - job.started, 3),
+        })
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local Whisper transcription server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default=get_setting("server_model", DEFAULT_MODEL))
+    parser.add_argument("--allow-models", nargs="*", default=None,
+                        help="extra models clients may request with ?model=")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker threads, each with its own resident model")
+    parser.add_argument("--queue-size", type=int, default=16,
+                        help="pending jobs before the server answers 503")
+    parser.add_argument("--batch-max", type=int, default=1,
+                        help="batch up to this many queued requests into one decode")
+    parser.add_argument("--batch-wait-ms", type=float, default=50,
+                        help="how long to wait for more requests to fill a batch")
+    parser.add_argument("--threads", type=int, default=None,
+                        help="torch intra-op threads (default: cores / workers)")
+    parser.add_argument("--no-result-cache", action="store_true",
+                        help="always transcribe, even audio seen before (for load tests)")
+    args = parser.parse_args(argv)
+
+    threads = args.threads or max(1, torch.get_num_threads() // args.workers)
+    torch.set_num_threads(threads)
+
+    service = TranscriptionService(args.model, args.workers, args.queue_size,
+                                   args.batch_max, args.batch_wait_ms / 1000, threads,
+                                   use_result_cache=not args.no_result_cache)
+    service.start()
+
+    TranscriptionRequestHandler.service = service
+    TranscriptionRequestHandler.allowed_models = tuple([args.model] + (args.allow_models or []))
+    httpd = ThreadingHTTPServer((args.host, args.port), TranscriptionRequestHandler)
+    httpd.daemon_threads = True
+    print(f"🌐 Transcription server running at http://{args.host}:{args.port}")
+    print(f"   model={args.model} workers={args.workers} queue={args.queue_size} "
+          f"batch={args.batch_max}/{args.batch_wait_ms:g}ms threads={threads}")
+    print("Press Ctrl+C to stop")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n🛑 Server stopped")
+    finally:
+        httpd.server_close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+import os
+import json
+import threading
+from pathlib import Path
+
+# User-level settings live in ~/.whisper_app/settings.json. Any key can be
+# overridden from the environment as WHISPER_APP_<KEY> (e.g.
+# WHISPER_APP_MODEL_CACHE_BUDGET_MB=3000).
+APP_DATA_DIR = Path(os.environ.get("WHISPER_APP_HOME", Path.home() / ".whisper_app"))
+SETTINGS_FILE = APP_DATA_DIR / "settings.json"
+
+DEFAULTS = {
+    # Resident model cache: evict least-recently-used models above this RSS
+    "model_cache_budget_mb": 4096,
+    # "Auto" model: pick the most accurate model expected to finish in this many seconds
+    "latency_budget_s": 2.0,
+    # Run CPU models with dynamically quantized INT8 Linear layers
+    "int8_quantization": False,
+    # Inference engine: "whisper" or a plugin from the whisper_app.backends entry points
+    "inference_backend": "whisper",
+    # Decoding profile: "fast" (greedy, no fallback), "balanced" or "accurate" (beam search)
+    "decoding_profile": "balanced",
+    # "auto" detects the language of every utterance, "sticky" detects it once
+    # and keeps it, "fixed" always uses `language` (e.g. "en")
+    "language_mode": "auto",
+    "language": "en",
+    # Run English through the faster tiny.en/base.en/small.en/medium.en checkpoints
+    "english_only_models": True,
+    # Torch CPU threads for the desktop app; 0 uses autotune.py results or a default
+    "intra_op_threads": 0,
+    "inter_op_threads": 0,
+    # On-disk cache of transcription results for identical audio; 0 disables it
+    "result_cache_mb": 256,
+    # Also cache the desktop app's dictations (stored as plaintext on disk)
+    "dictation_result_cache": False,
+    # Transcribe each completed 30 s window of a long dictation while recording
+    "background_windows": True,
+    # Compute the log-mel spectrogram while recording instead of after release
+    "incremental_mel": True,
+    # Append per-utterance stage timings to ~/.whisper_app/latency/ (JSONL and Chrome trace)
+    "latency_log": False,
+    # Trim leading/trailing silence and skip clips with no speech
+    "vad_enabled": True,
+    # Paste a draft from draft_model at once, then refine with the selected model
+    "two_pass": False,
+    "draft_model": "tiny",
+    # Show partial results while the hotkey is held
+    "streaming_transcription": False,
+    # Keep the microphone open and prepend this much audio to each recording
+    "preroll_enabled": False,
+    "preroll_ms": 500,
+}
+
+_lock = threading.Lock()
+_settings = None
+
+def app_data_dir():
+    """Return the per-user data directory, creating it if needed"""
+    APP_DATA_DIR.mkdir(parents=True, exist_ok=True)
+    return APP_DATA_DIR
+
+def _load():
+    global _settings
+    if _settings is None:
+        _settings = {}
+        try:
+            with open(SETTINGS_FILE) as f:
+                _settings = json.load(f)
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Warning: could not read {SETTINGS_FILE}: {e}")
+    return _settings
+
+def _coerce(value, like):
+    """Convert an environment string to the type of the default value"""
+    if isinstance(like, bool):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(like, int):
+        return int(value)
+    if isinstance(like, float):
+        return float(value)
+    return value
+
+def get_setting(key, default=None):
+    """Look up a setting: environment first, then settings.json, then DEFAULTS"""
+    if default is None:
+        default = DEFAULTS.get(key)
+
+    env_value = os.environ.get(f"WHISPER_APP_{key.upper()}")
+    if env_value is not None:
+        try:
+            return _coerce(env_value, default) if default is not None else env_value
+        except ValueError:
+            print(f"Warning: ignoring invalid WHISPER_APP_{key.upper()}={env_value!r}")
+
+    with _lock:
+        return _load().get(key, default)
+
+def set_setting(key, value):
+    """Persist a setting to settings.json"""
+    with _lock:
+        settings = _load()
+        settings[key] = value
+        try:
+            app_data_dir()
+            with open(SETTINGS_FILE, "w") as f:
+                json.dump(settings, f, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Warning: could not save {SETTINGS_FILE}: {e}")
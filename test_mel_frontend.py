@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+
+# The streaming log-mel frontend must match the one-shot computation for any
+# trimmed slice of the capture
+
+import numpy as np
+import pytest
+
+from audio_buffer import CaptureBuffer
+from mel_frontend import HOP_LENGTH, N_FFT, StreamingLogMel, log_mel_spectrogram
+
+SR = 16000
+
+@pytest.fixture(scope="module")
+def captured():
+    rng = np.random.default_rng(0)
+    # Whisper's real filterbank needs the whisper package; any non-negative one will do
+    filters = rng.random((80, N_FFT // 2 + 1), dtype=np.float32) / 100
+    samples = (rng.standard_normal(3 * SR + 777) * 3000).clip(-32768, 32767).astype(np.int16)
+    buffer = CaptureBuffer(initial_seconds=1)
+    mel = StreamingLogMel(filters=filters)
+    for i in range(0, len(samples), 1024):
+        buffer.append(samples[i:i + 1024])
+        mel.advance(buffer)
+    return buffer.to_float32(), mel, filters
+
+@pytest.mark.parametrize("start, end", [
+    (0, None),                       # whole capture
+    (10 * HOP_LENGTH, None),         # VAD-trimmed start on a hop boundary
+    (10 * HOP_LENGTH + 37, None),    # start between hops: nothing can be reused
+    (10 * HOP_LENGTH, -3333),        # trimmed at both ends
+])
+def test_finish_matches_one_shot(captured, start, end):
+    audio, mel, filters = captured
+    clip = audio[start:end]
+    expected = log_mel_spectrogram(clip, filters=filters)
+    actual = mel.finish(clip, start)
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=0, atol=1e-6)
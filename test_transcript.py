@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+
+# Unit tests for the pure-Python parts of transcription.py: transcript
+# stitching and Auto model selection
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("whisper")
+
+import transcription
+from transcription import (
+    MODEL_COST_PRIORS, RealtimeFactors, StreamingTranscript, WindowedTranscript, choose_model
+)
+
+SR = 16000
+
+def seg(start, end, text):
+    return {"start": start, "end": end, "text": text}
+
+def test_windowed_restarts_before_commit_point():
+    transcript = WindowedTranscript(sample_rate=SR)
+    transcript.add_window([seg(0, 8, " One."), seg(8, 29.9, " Two")], 0, 30 * SR)
+    # [8, 29.9] may be cut off, so only [0, 8] commits; 8-30 s must be decoded again
+    assert transcript.committed_text == "One."
+    assert transcript.committed_until == 8
+    assert transcript.next_sample == 7 * SR
+
+def test_windowed_never_skips_audio_after_a_short_commit():
+    transcript = WindowedTranscript(sample_rate=SR)
+    transcript.add_window([seg(0, 0.5, " Hi."), seg(0.5, 29.9, " rest")], 0, 30 * SR)
+    assert 0 < transcript.next_sample <= int(transcript.committed_until * SR)
+
+def test_windowed_dedupes_words_across_the_seam():
+    transcript = WindowedTranscript(sample_rate=SR)
+    transcript.add_window([seg(0, 10, " Hello there."), seg(10, 28.5, " This is a test"),
+                           seg(28.5, 30, " of the")], 0, 30 * SR)
+    start = transcript.next_sample
+    assert start == int(27.5 * SR)
+    text = transcript.finish([seg(0, 1.6, " a test of the"), seg(1.6, 5, " window system.")], start)
+    assert text == "Hello there. This is a test of the window system."
+
+def test_windowed_silence_moves_on():
+    transcript = WindowedTranscript(sample_rate=SR)
+    transcript.add_window([], 0, 30 * SR)
+    assert transcript.committed_text == ""
+    assert transcript.next_sample == 28 * SR
+
+def test_windowed_single_long_segment_still_progresses():
+    transcript = WindowedTranscript(sample_rate=SR)
+    transcript.add_window([seg(0, 30, " one long run-on")], 0, 30 * SR)
+    assert transcript.committed_text == "one long run-on"
+    assert transcript.next_sample > 0
+
+def test_streaming_commits_agreed_segments_before_the_guard():
+    transcript = StreamingTranscript(sample_rate=SR, guard=1.0)
+    passes = [seg(0, 2, " Hello."), seg(2, 4.5, " World")]
+    committed, tentative = transcript.update(passes, 5.0)
+    assert committed == ""
+    assert tentative == "Hello. World"
+
+    committed, tentative = transcript.update(passes, 5.0)
+    # Both agree, but the second ends within the guard of the audio's end
+    assert committed == "Hello."
+    assert tentative == "World"
+    assert transcript.committed_until == 2
+    assert transcript.committed_sample == 2 * SR
+
+def test_streaming_forces_commits_past_max_window():
+    transcript = StreamingTranscript(sample_rate=SR, max_window=20.0)
+    transcript.update([seg(0, 10, " a"), seg(10, 21, " b"), seg(21, 25, " c")], 25.0)
+    assert transcript.committed_text == "a b"
+    assert transcript.tentative_text == "c"
+
+def test_streaming_finish_appends_tail():
+    transcript = StreamingTranscript(sample_rate=SR)
+    passes = [seg(0, 2, " Hello.")]
+    transcript.update(passes, 5.0)
+    transcript.update(passes, 5.0)
+    assert transcript.finish([seg(0, 1, " Bye.")]) == "Hello. Bye."
+    assert transcript.tentative_text == ""
+
+def test_windowed_drops_segments_already_committed():
+    transcript = WindowedTranscript(sample_rate=SR)
+    transcript.add_window([seg(0, 10, " Hello there."), seg(10, 29.5, " cut")], 0, 30 * SR)
+    start = transcript.next_sample
+    # The first second repeats "there." up to the commit point at 10 s
+    text = transcript.finish([seg(0, 1.05, " there."), seg(1.05, 4, " Next sentence.")], start)
+    assert text == "Hello there. Next sentence."
+
+class FakeCache:
+    """Just enough of ModelCache for choose_model"""
+
+    def __init__(self, resident=()):
+        self.resident = set(resident)
+
+    def key_for(self, model_size):
+        return (model_size, "cpu", "fp32", "whisper")
+
+    def loaded_keys(self):
+        return [self.key_for(m) for m in self.resident]
+
+    def is_loaded(self, model_size):
+        return model_size in self.resident
+
+@pytest.fixture
+def english_pinned(tmp_path, monkeypatch):
+    monkeypatch.setenv("WHISPER_APP_LANGUAGE_MODE", "fixed")
+    monkeypatch.setenv("WHISPER_APP_LANGUAGE", "en")
+    monkeypatch.setenv("WHISPER_APP_ENGLISH_ONLY_MODELS", "1")
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    names = ["tiny", "base", "small", "medium", "large"]
+    names += [f"{m}.en" for m in transcription.ENGLISH_ONLY_MODELS]
+    monkeypatch.setattr(transcription.whisper, "_MODELS",
+                        {m: f"https://example.invalid/{m}.pt" for m in names}, raising=False)
+    monkeypatch.setattr(transcription, "_realtime_factors", RealtimeFactors(path=tmp_path / "rtf.json"))
+    (tmp_path / "whisper").mkdir()
+    return tmp_path / "whisper"
+
+def test_auto_counts_english_checkpoints_on_disk(english_pinned):
+    (english_pinned / "small.en.pt").touch()
+    assert choose_model(5.0, budget=100, cache=FakeCache()) == "small"
+
+def test_auto_skips_sizes_whose_english_checkpoint_is_missing(english_pinned):
+    # small would route to small.en, which would have to be downloaded mid-dictation
+    (english_pinned / "small.pt").touch()
+    (english_pinned / "tiny.en.pt").touch()
+    assert choose_model(5.0, budget=100, cache=FakeCache()) == "tiny"
+
+def test_auto_sees_resident_english_checkpoint(english_pinned):
+    cache = FakeCache(resident=["small.en"])
+    overhead, rtf, _ = MODEL_COST_PRIORS["small"]
+    # No cold-load cost for a model that's already resident as small.en
+    assert transcription.get_realtime_factors().estimate("small", 5.0, cache) == overhead + rtf * 5.0
+    assert choose_model(5.0, budget=overhead + rtf * 5.0, cache=cache) == "small"
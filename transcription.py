@@ -0,0 +1,1012 @@
+#!/usr/bin/env python3
+
+# Qt-free Whisper inference core shared by the GUI and headless tools
+
+import os
+import io
+import sys
+import gc
+import ssl
+import json
+import wave
+import platform
+import threading
+import subprocess
+import dataclasses
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+import torch
+import whisper
+
+from settings import get_setting, app_data_dir
+from result_cache import get_result_cache
+
+# Handle SSL certificate issues for model downloads
+ssl._create_default_https_context = ssl._create_unverified_context
+
+# Available Whisper models
+MODELS = {
+    "tiny": "Fastest, least accurate",
+    "base": "Good balance of speed and accuracy",
+    "small": "Better accuracy, slower",
+    "medium": "High accuracy, much slower",
+    "large": "Best accuracy, very slow"
+}
+DEFAULT_MODEL = "base"
+
+# psutil gives accurate RSS on every platform; fall back to /proc when missing
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+def current_rss_bytes():
+    """Resident set size of this process, or None if it can't be measured"""
+    if PSUTIL_AVAILABLE:
+        try:
+            return psutil.Process().memory_info().rss
+        except Exception:
+            pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except Exception:
+        return None
+
+THREAD_TUNING_FILE = "thread_tuning.json"
+
+def physical_cores():
+    if PSUTIL_AVAILABLE:
+        cores = psutil.cpu_count(logical=False)
+        if cores:
+            return cores
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def machine_id():
+    """Identifies the hardware tuned thread counts were measured on"""
+    return f"{platform.node()}-{platform.machine()}-{os.cpu_count()}"
+
+def load_thread_tuning():
+    """Autotuned thread counts for this machine, by model size"""
+    try:
+        with open(app_data_dir() / THREAD_TUNING_FILE) as f:
+            return json.load(f).get(machine_id(), {})
+    except FileNotFoundError:
+        return {}
+    except Exception as e:
+        print(f"Warning: could not read {THREAD_TUNING_FILE}: {e}")
+        return {}
+
+def save_thread_tuning(results):
+    """Store {model_size: {"intra_op_threads": n, "inter_op_threads": m}} for this machine"""
+    path = app_data_dir() / THREAD_TUNING_FILE
+    try:
+        with open(path) as f:
+            tuning = json.load(f)
+    except (FileNotFoundError, ValueError):
+        tuning = {}
+    tuning.setdefault(machine_id(), {}).update(results)
+    with open(path, "w") as f:
+        json.dump(tuning, f, indent=2, sort_keys=True)
+    return path
+
+def thread_settings(model_size=DEFAULT_MODEL):
+    """(intra_op, inter_op) threads: explicit settings, then autotuned, then a default
+
+    The default leaves a core free for the UI, audio capture and hotkey threads.
+    """
+    tuned = load_thread_tuning().get(model_size, {})
+    intra = get_setting("intra_op_threads") or tuned.get("intra_op_threads") or max(1, physical_cores() - 1)
+    inter = get_setting("inter_op_threads") or tuned.get("inter_op_threads") or 1
+    return intra, inter
+
+_interop_configured = False
+
+def apply_thread_settings(model_size=DEFAULT_MODEL):
+    """Set torch's thread pools for the next inference with model_size
+
+    Inter-op threads can only be set before torch's first parallel work, so
+    only the first call changes them.
+    """
+    global _interop_configured
+    intra, inter = thread_settings(model_size)
+    if not _interop_configured:
+        _interop_configured = True
+        try:
+            torch.set_num_interop_threads(inter)
+        except RuntimeError as e:
+            print(f"Warning: inter-op threads already fixed at {torch.get_num_interop_threads()}: {e}")
+    if torch.get_num_threads() != intra:
+        torch.set_num_threads(intra)
+    return intra, inter
+
+def default_device():
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+def default_precision(device):
+    # FP16 is not supported on CPU, so CPU models run in FP32 unless the
+    # dynamically quantized INT8 mode is switched on
+    if device == "cuda":
+        return "fp16"
+    return "int8" if get_setting("int8_quantization") else "fp32"
+
+def model_nbytes(model):
+    """Bytes held by a model's parameters and buffers"""
+    total = 0
+    for tensor in list(model.parameters()) + list(model.buffers()):
+        total += tensor.numel() * tensor.element_size()
+    # Dynamically quantized Linear layers keep their packed weights outside parameters()
+    for module in model.modules():
+        if isinstance(module, torch.ao.nn.quantized.dynamic.Linear):
+            for tensor in module._weight_bias():
+                if tensor is not None:
+                    total += tensor.numel() * tensor.element_size()
+    return total
+
+def quantized_model_path(model_size):
+    # Packed INT8 weights are only portable between identical torch builds
+    version = torch.__version__.split("+")[0]
+    return app_data_dir() / "quantized" / f"{model_size}-int8-torch{version}.pt"
+
+def quantize_model(model):
+    """Dynamically quantize the Linear layers of a CPU FP32 model to INT8"""
+    # whisper's Linear subclass only adds dtype casting, but quantize_dynamic
+    # swaps exact nn.Linear types only
+    for module in model.modules():
+        if isinstance(module, torch.nn.Linear):
+            module.__class__ = torch.nn.Linear
+    return torch.ao.quantization.quantize_dynamic(model.eval(), {torch.nn.Linear}, dtype=torch.qint8)
+
+def load_quantized_model(model_size):
+    """Load an INT8 model, reusing quantized weights cached on disk"""
+    path = quantized_model_path(model_size)
+    if path.exists():
+        try:
+            checkpoint = torch.load(path, map_location="cpu", weights_only=False)
+            # Quantize an empty skeleton so its modules match, then fill in the weights
+            model = quantize_model(whisper.model.Whisper(whisper.model.ModelDimensions(**checkpoint["dims"])))
+            model.load_state_dict(checkpoint["model_state_dict"])
+            if model_size in whisper._ALIGNMENT_HEADS:
+                model.set_alignment_heads(whisper._ALIGNMENT_HEADS[model_size])
+            return model
+        except Exception as e:
+            print(f"Warning: ignoring quantized weights in {path}: {e}")
+
+    model = quantize_model(whisper.load_model(model_size, device="cpu"))
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".partial")
+        torch.save({"dims": dataclasses.asdict(model.dims), "model_state_dict": model.state_dict()}, partial)
+        os.replace(partial, path)
+        print(f"Saved quantized {model_size} weights to {path}")
+    except Exception as e:
+        print(f"Warning: could not save quantized weights to {path}: {e}")
+    return model
+
+class InferenceBackend:
+    """An inference engine: loads models and transcribes 16 kHz float32 audio
+
+    Third-party backends subclass this and register under the
+    "whisper_app.backends" entry point group, e.g. in pyproject.toml:
+
+        [project.entry-points."whisper_app.backends"]
+        onnx = "whisper_onnx:OnnxBackend"
+
+    and are picked with the inference_backend setting. transcribe() returns a
+    dict shaped like model.transcribe's: "text", "language" and "segments"
+    with "start", "end" and "text". Options are model.transcribe keyword
+    arguments; backends ignore the ones they don't support.
+    """
+
+    name = None
+    # Whether transcribe() takes a precomputed log-mel spectrogram as mel=
+    accepts_mel = False
+
+    def load(self, model_size, device, precision):
+        """Return a loaded model handle for the cache to keep resident"""
+        raise NotImplementedError
+
+    def transcribe(self, entry, audio, cancel_event=None, **options):
+        """Transcribe with the resident entry; raise TranscriptionCancelled when
+        cancel_event is set, as soon as the engine allows"""
+        raise NotImplementedError
+
+    def stream(self, entry, audio, cancel_event=None, **options):
+        """Yield segments as they are decoded
+
+        Engines without incremental output yield the segments of one
+        transcribe() call.
+        """
+        yield from self.transcribe(entry, audio, cancel_event, **options)["segments"]
+
+    def model_nbytes(self, model):
+        return model_nbytes(model) if isinstance(model, torch.nn.Module) else 0
+
+class WhisperBackend(InferenceBackend):
+    """The reference openai-whisper PyTorch implementation"""
+
+    name = "whisper"
+    accepts_mel = True
+
+    def load(self, model_size, device, precision):
+        if precision == "int8":
+            return load_quantized_model(model_size)
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, entry, audio, cancel_event=None, mel=None, **options):
+        options.setdefault("fp16", entry.fp16)
+        with cancellable(entry.model, cancel_event), precomputed_mel(mel):
+            return entry.model.transcribe(audio, **options)
+
+BACKEND_ENTRY_POINT_GROUP = "whisper_app.backends"
+BUILTIN_BACKENDS = {WhisperBackend.name: WhisperBackend}
+
+_backends = {}
+_backends_lock = threading.Lock()
+
+def _backend_entry_points():
+    from importlib import metadata
+    entry_points = metadata.entry_points()
+    if hasattr(entry_points, "select"):
+        return list(entry_points.select(group=BACKEND_ENTRY_POINT_GROUP))
+    return list(entry_points.get(BACKEND_ENTRY_POINT_GROUP, []))
+
+def available_backends():
+    """Backend classes by name: the built-in ones plus installed plugins"""
+    backends = dict(BUILTIN_BACKENDS)
+    for entry_point in _backend_entry_points():
+        try:
+            backends[entry_point.name] = entry_point.load()
+        except Exception as e:
+            print(f"Warning: could not load inference backend {entry_point.name!r}: {e}")
+    return backends
+
+def default_backend_name():
+    return get_setting("inference_backend")
+
+def get_backend(name=None):
+    """Return the shared instance of a backend, the configured one by default"""
+    name = name or default_backend_name()
+    with _backends_lock:
+        backend = _backends.get(name)
+        if backend is None:
+            backends = available_backends()
+            if name not in backends:
+                raise ValueError(f"Unknown inference backend {name!r}; installed: {', '.join(sorted(backends))}")
+            backend = _backends[name] = backends[name]()
+        return backend
+
+class CachedModel:
+    """A resident model plus the bookkeeping the cache needs to evict it"""
+
+    def __init__(self, key, model, backend):
+        self.key = key
+        self.model = model
+        self.backend = backend
+        self.nbytes = backend.model_nbytes(model)
+        self.in_use = 0
+        self.warmed_up = False
+        # Serializes inference on one model instance across threads
+        self.lock = threading.RLock()
+
+    @property
+    def model_size(self):
+        return self.key[0]
+
+    @property
+    def device(self):
+        return self.key[1]
+
+    @property
+    def precision(self):
+        return self.key[2]
+
+    @property
+    def backend_name(self):
+        return self.key[3]
+
+    @property
+    def fp16(self):
+        return self.precision == "fp16"
+
+class ModelCache:
+    """Process-wide LRU cache of loaded Whisper models with an RSS budget"""
+
+    def __init__(self, budget_mb=None):
+        if budget_mb is None:
+            budget_mb = get_setting("model_cache_budget_mb")
+        self.budget_bytes = int(budget_mb) * 1024 * 1024
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._load_locks = {}
+
+    def key_for(self, model_size, device=None, precision=None, backend=None):
+        device = device or default_device()
+        precision = precision or default_precision(device)
+        if precision == "int8":
+            # Dynamic quantization kernels only exist for CPU
+            device = "cpu"
+        return (model_size, device, precision, backend or default_backend_name())
+
+    def is_loaded(self, model_size, device=None, precision=None, backend=None):
+        with self._lock:
+            return self.key_for(model_size, device, precision, backend) in self._entries
+
+    def loaded_keys(self):
+        with self._lock:
+            return list(self._entries.keys())
+
+    def get(self, model_size, device=None, precision=None, backend=None, pin=False):
+        """Return the resident entry for a model, loading it on a miss"""
+        key = self.key_for(model_size, device, precision, backend)
+
+        with self._lock:
+            entry = self._hit(key, pin)
+            if entry:
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Only one thread loads a given model; the others wait and reuse it
+        with load_lock:
+            with self._lock:
+                entry = self._hit(key, pin)
+                if entry:
+                    return entry
+
+            print(f"Loading Whisper model: {model_size} ({key[1]}, {key[2]}, {key[3]} backend)")
+            backend = get_backend(key[3])
+            model = backend.load(*key[:3])
+            entry = CachedModel(key, model, backend)
+            print(f"✅ Model {model_size} resident ({entry.nbytes / 1e6:.0f} MB)")
+            if entry.nbytes > self.budget_bytes:
+                print(f"⚠️ {model_size} ({entry.nbytes / 1e6:.0f} MB) exceeds model_cache_budget_mb "
+                      f"({self.budget_bytes / 1e6:.0f} MB); keeping it resident anyway")
+
+            with self._lock:
+                self._entries[key] = entry
+                self._load_locks.pop(key, None)
+                if pin:
+                    entry.in_use += 1
+            self._enforce_budget(protect=key)
+            return entry
+
+    def _hit(self, key, pin):
+        # Caller holds self._lock
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+            if pin:
+                entry.in_use += 1
+        return entry
+
+    @contextmanager
+    def use(self, model_size, device=None, precision=None, backend=None):
+        """Borrow a resident model; it can't be evicted while borrowed"""
+        entry = self.get(model_size, device, precision, backend, pin=True)
+        try:
+            with entry.lock:
+                yield entry
+        finally:
+            with self._lock:
+                entry.in_use -= 1
+            self._enforce_budget()
+
+    def evict(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry:
+            print(f"♻️ Evicting Whisper model: {entry.model_size}")
+            entry.model = None
+            del entry
+            gc.collect()
+
+    def clear(self):
+        for key in self.loaded_keys():
+            self.evict(key)
+
+    def _enforce_budget(self, protect=None):
+        """Evict least-recently-used idle models until RSS fits the budget"""
+        rss = current_rss_bytes()
+        with self._lock:
+            if rss is None:
+                rss = sum(entry.nbytes for entry in self._entries.values())
+            overflow = rss - self.budget_bytes
+            if overflow <= 0:
+                return
+
+            # Allocators rarely hand memory straight back to the OS, so plan
+            # evictions from the bytes each model accounts for instead of
+            # re-measuring RSS after every drop.
+            # Never drop the most recently used model: the next utterance
+            # would only load it again. A single model over the budget stays.
+            newest = next(reversed(self._entries), None)
+            victims = []
+            for key, entry in self._entries.items():
+                if overflow <= 0:
+                    break
+                if key in (protect, newest) or entry.in_use:
+                    continue
+                victims.append(key)
+                overflow -= entry.nbytes
+
+        for key in victims:
+            self.evict(key)
+
+_model_cache = None
+_model_cache_lock = threading.Lock()
+
+def get_model_cache():
+    """Return the process-wide model cache"""
+    global _model_cache
+    with _model_cache_lock:
+        if _model_cache is None:
+            _model_cache = ModelCache()
+        return _model_cache
+
+def pcm16_to_float32(data, channels=1):
+    """Convert interleaved int16 PCM bytes to mono float32 in [-1, 1)"""
+    audio = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+    if channels > 1:
+        audio = audio[:len(audio) - len(audio) % channels].reshape(-1, channels).mean(axis=1)
+    audio *= 1.0 / 32768.0
+    return audio
+
+def decode_wav(source):
+    """Decode 16 kHz 16-bit PCM WAV (path, bytes or file) without ffmpeg
+
+    Returns None for any other WAV flavour so callers can fall back.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    try:
+        with wave.open(source, "rb") as wf:
+            if wf.getsampwidth() != 2 or wf.getframerate() != whisper.audio.SAMPLE_RATE:
+                return None
+            return pcm16_to_float32(wf.readframes(wf.getnframes()), wf.getnchannels())
+    except (wave.Error, EOFError):
+        return None
+
+def load_audio_file(path):
+    """Load a file as 16 kHz mono float32, skipping ffmpeg for plain WAVs"""
+    if str(path).lower().endswith(".wav"):
+        audio = decode_wav(str(path))
+        if audio is not None:
+            return audio
+    return whisper.load_audio(str(path))
+
+def decode_audio_bytes(data):
+    """Decode an uploaded audio file held in memory to 16 kHz mono float32"""
+    audio = decode_wav(data)
+    if audio is not None:
+        return audio
+    # Anything else goes through ffmpeg over a pipe, like whisper.load_audio
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-i", "pipe:0",
+           "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+           "-ar", str(whisper.audio.SAMPLE_RATE), "-"]
+    try:
+        out = subprocess.run(cmd, input=bytes(data), capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace')}") from e
+    return pcm16_to_float32(out)
+
+class TranscriptionCancelled(Exception):
+    """Raised out of model.transcribe when its cancel event is set"""
+
+@contextmanager
+def cancellable(model, cancel_event):
+    """Abort inference at the next encoder or decoder step once cancel_event is set
+
+    model.transcribe has no cancellation hook of its own, so a pre-forward
+    hook raises between steps. The CPU is freed within one decoder step.
+    """
+    if cancel_event is None:
+        yield
+        return
+
+    def check(module, args):
+        if cancel_event.is_set():
+            raise TranscriptionCancelled()
+
+    # Hooks are per call; the entry lock keeps other callers off the model meanwhile
+    handles = [model.encoder.register_forward_pre_hook(check),
+               model.decoder.register_forward_pre_hook(check)]
+    try:
+        yield
+    finally:
+        for handle in handles:
+            handle.remove()
+
+_precomputed = threading.local()
+_mel_hook_installed = False
+_mel_hook_lock = threading.Lock()
+
+def _install_mel_hook():
+    """Let model.transcribe use a log-mel computed during capture
+
+    whisper.transcribe computes the spectrogram itself with no way to pass one
+    in, so its module-level log_mel_spectrogram is wrapped once; the wrapper
+    returns the calling thread's precomputed mel when one is set.
+    """
+    global _mel_hook_installed
+    with _mel_hook_lock:
+        if _mel_hook_installed:
+            return
+        module = sys.modules["whisper.transcribe"]
+        reference = module.log_mel_spectrogram
+
+        def log_mel_spectrogram(audio, n_mels=80, padding=0, device=None):
+            mel = getattr(_precomputed, "mel", None)
+            if mel is not None and mel.shape[0] == n_mels:
+                _precomputed.mel = None
+                mel = torch.from_numpy(mel)
+                return mel.to(device) if device is not None else mel
+            return reference(audio, n_mels, padding=padding, device=device)
+
+        module.log_mel_spectrogram = log_mel_spectrogram
+        _mel_hook_installed = True
+
+@contextmanager
+def precomputed_mel(mel):
+    """Use mel (from mel_frontend) instead of recomputing it inside model.transcribe"""
+    if mel is None:
+        yield
+        return
+    _install_mel_hook()
+    _precomputed.mel = mel
+    try:
+        yield
+    finally:
+        _precomputed.mel = None
+
+def model_n_mels(model_size):
+    """Mel bins a model expects: 128 for the large-v3 family, 80 otherwise"""
+    return 128 if "large-v3" in whisper._MODELS.get(model_size, model_size) else 80
+
+# Named model.transcribe settings trading accuracy for predictable latency.
+# Whisper's defaults re-decode a segment at up to six temperatures when it
+# looks repetitive or unlikely, and feed each window the previous text, which
+# can make a stuck decode loop; "fast" never re-decodes.
+DECODING_PROFILES = {
+    "fast": {
+        # A single temperature means the thresholds only gate no-speech, never a retry
+        "temperature": 0.0,
+        "condition_on_previous_text": False,
+    },
+    "balanced": {
+        "temperature": (0.0, 0.4, 0.8),
+        "condition_on_previous_text": False,
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+    },
+    "accurate": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": (0.0, 0.2, 0.4, 0.6, 0.8, 1.0),
+        "condition_on_previous_text": True,
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+    },
+}
+DEFAULT_PROFILE = "balanced"
+
+def decoding_options(profile=None, **overrides):
+    """Options passed to model.transcribe by every entry point
+
+    Starts from the named decoding profile (the decoding_profile setting by
+    default); explicit keyword arguments win over it.
+    """
+    profile = profile or get_setting("decoding_profile")
+    if profile not in DECODING_PROFILES:
+        print(f"Warning: unknown decoding profile {profile!r}, using {DEFAULT_PROFILE}")
+        profile = DEFAULT_PROFILE
+    options = dict(DECODING_PROFILES[profile])
+    options.update(overrides)
+    return options
+
+def transcribe_audio(audio, model_size=DEFAULT_MODEL, cache=None, cancel_event=None,
+                     use_result_cache=True, mel=None, **options):
+    """Transcribe a path or 16 kHz float32 array with a resident model
+
+    Identical audio, model and options are answered from the on-disk result
+    cache; those results carry "from_cache": True. mel is the audio's
+    padded log-mel if it was already computed during capture. Raises
+    TranscriptionCancelled if cancel_event is set before it finishes.
+    """
+    options = decoding_options(**options)
+    cache = cache or get_model_cache()
+    if cancel_event is not None and cancel_event.is_set():
+        raise TranscriptionCancelled()
+
+    results = get_result_cache() if use_result_cache else None
+    if results:
+        if not isinstance(audio, np.ndarray):
+            audio = load_audio_file(audio)
+        key = results.key(audio, cache.key_for(model_size), options)
+        result = results.get(key)
+        if result is not None:
+            result["from_cache"] = True
+            return result
+
+    with cache.use(model_size) as entry:
+        if mel is not None and entry.backend.accepts_mel:
+            options["mel"] = mel
+        result = entry.backend.transcribe(entry, audio, cancel_event, **options)
+    if results:
+        results.put(key, result)
+    return result
+
+def warm_up_model(model_size=DEFAULT_MODEL, seconds=1.0, cache=None):
+    """Load a model and run a throwaway transcription to prime kernels"""
+    cache = cache or get_model_cache()
+    with cache.use(model_size) as entry:
+        if entry.warmed_up:
+            return entry
+        # Quiet noise rather than digital silence keeps the decoder from
+        # taking the no-speech shortcut, so the full path gets exercised
+        rng = np.random.default_rng(0)
+        clip = (rng.standard_normal(int(whisper.audio.SAMPLE_RATE * seconds)) * 1e-3).astype(np.float32)
+        print(f"Warming up Whisper model: {model_size}")
+        entry.backend.transcribe(entry, clip, temperature=0.0, condition_on_previous_text=False)
+        entry.warmed_up = True
+        return entry
+
+LANGUAGE_MODES = ("auto", "sticky", "fixed")
+# Sizes with an English-only checkpoint, which is faster and more accurate for English
+ENGLISH_ONLY_MODELS = ("tiny", "base", "small", "medium")
+
+def model_for_language(model_size, language):
+    """The checkpoint to run for language: the .en variant when English is known"""
+    if language == "en" and model_size in ENGLISH_ONLY_MODELS and get_setting("english_only_models"):
+        return f"{model_size}.en"
+    return model_size
+
+class LanguagePolicy:
+    """Which language to decode in, per the language_mode setting
+
+    "fixed" always uses the language setting, "sticky" detects the language
+    of the first utterance and keeps it, and "auto" detects it every time.
+    Passing a language skips Whisper's detection pass.
+    """
+
+    def __init__(self):
+        self._detected = None
+        self._lock = threading.Lock()
+
+    @property
+    def mode(self):
+        mode = get_setting("language_mode")
+        return mode if mode in LANGUAGE_MODES else "auto"
+
+    def language(self):
+        """The language to pass to transcribe, or None to detect it"""
+        mode = self.mode
+        if mode == "fixed":
+            return get_setting("language") or None
+        if mode == "sticky":
+            with self._lock:
+                return self._detected
+        return None
+
+    def route(self, model_size):
+        """(checkpoint to run, language to pass) for an utterance with model_size"""
+        language = self.language()
+        return model_for_language(model_size, language), language
+
+    def observe(self, language):
+        """Record a detected language; returns it if sticky mode just adopted it"""
+        if not language or self.mode != "sticky":
+            return None
+        with self._lock:
+            if self._detected is not None:
+                return None
+            self._detected = language
+        print(f"Detected language {language}, using it from now on")
+        return language
+
+    def reset(self):
+        """Forget the sticky language, e.g. after the settings changed"""
+        with self._lock:
+            self._detected = None
+
+_language_policy = LanguagePolicy()
+
+def get_language_policy():
+    return _language_policy
+
+AUTO_MODEL = "auto"
+REALTIME_FACTORS_FILE = "realtime_factors.json"
+
+# (seconds per call, seconds per audio second, cold load seconds) on a
+# typical laptop CPU; used until this machine has measurements of its own.
+# The per-call part is large because the encoder always sees 30 s windows.
+MODEL_COST_PRIORS = {
+    "tiny": (0.2, 0.03, 0.5),
+    "base": (0.4, 0.06, 1.0),
+    "small": (1.2, 0.15, 2.5),
+    "medium": (3.5, 0.4, 6.0),
+    "large": (7.0, 0.8, 12.0),
+}
+
+def downloaded_models():
+    """Model sizes whose checkpoints are already on disk, fastest first
+
+    A size counts when the checkpoint it routes to for the current language
+    (e.g. small.en with English pinned) is the one on disk.
+    """
+    root = os.path.join(os.getenv("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")), "whisper")
+    policy = get_language_policy()
+    found = []
+    for model_size in MODELS:
+        url = whisper._MODELS.get(policy.route(model_size)[0])
+        if url and os.path.exists(os.path.join(root, os.path.basename(url))):
+            found.append(model_size)
+    return found
+
+class RealtimeFactors:
+    """Measured inference time per model on this machine
+
+    Fits seconds = overhead + rtf * audio_seconds by least squares over
+    exponentially decayed sums, so recent utterances count the most.
+    """
+
+    def __init__(self, path=None, decay=0.9):
+        self.path = path or app_data_dir() / REALTIME_FACTORS_FILE
+        self.decay = decay
+        self._lock = threading.Lock()
+        self._stats = None
+
+    def _key(self, model_size, cache):
+        return "/".join(cache.key_for(model_size))
+
+    def _load(self):
+        # Caller holds self._lock
+        if self._stats is None:
+            try:
+                with open(self.path) as f:
+                    self._stats = json.load(f).get(machine_id(), {})
+            except FileNotFoundError:
+                self._stats = {}
+            except Exception as e:
+                print(f"Warning: could not read {self.path}: {e}")
+                self._stats = {}
+        return self._stats
+
+    def _save(self):
+        # Caller holds self._lock
+        try:
+            with open(self.path) as f:
+                everything = json.load(f)
+        except (FileNotFoundError, ValueError):
+            everything = {}
+        everything[machine_id()] = self._stats
+        try:
+            with open(self.path, "w") as f:
+                json.dump(everything, f, indent=2, sort_keys=True)
+        except Exception as e:
+            print(f"Warning: could not save {self.path}: {e}")
+
+    def record(self, model_size, audio_seconds, seconds, cache=None):
+        cache = cache or get_model_cache()
+        with self._lock:
+            stats = self._load().setdefault(self._key(model_size, cache), dict.fromkeys(("n", "x", "y", "xx", "xy"), 0.0))
+            d = self.decay
+            stats["n"] = stats["n"] * d + 1
+            stats["x"] = stats["x"] * d + audio_seconds
+            stats["y"] = stats["y"] * d + seconds
+            stats["xx"] = stats["xx"] * d + audio_seconds * audio_seconds
+            stats["xy"] = stats["xy"] * d + audio_seconds * seconds
+            self._save()
+
+    def cost(self, model_size, cache=None):
+        """(seconds per call, seconds per audio second) for a model"""
+        cache = cache or get_model_cache()
+        overhead, rtf, _ = MODEL_COST_PRIORS.get(model_size, MODEL_COST_PRIORS["large"])
+        with self._lock:
+            stats = self._load().get(self._key(model_size, cache))
+        if not stats or not stats["n"]:
+            return overhead, rtf
+        n = stats["n"]
+        mean_x, mean_y = stats["x"] / n, stats["y"] / n
+        variance = stats["xx"] / n - mean_x * mean_x
+        if variance > 1.0:
+            # Enough spread in durations to fit both terms
+            rtf = max(0.0, (stats["xy"] / n - mean_x * mean_y) / variance)
+            return max(0.0, mean_y - rtf * mean_x), rtf
+        # Similar-length clips only: keep the prior's shape, rescaled to what was measured
+        scale = mean_y / (overhead + rtf * mean_x)
+        return overhead * scale, rtf * scale
+
+    def estimate(self, model_size, audio_seconds, cache=None):
+        """Expected seconds to text, including a cold load if the model isn't resident"""
+        cache = cache or get_model_cache()
+        overhead, rtf = self.cost(model_size, cache)
+        seconds = overhead + rtf * audio_seconds
+        if not cache.is_loaded(get_language_policy().route(model_size)[0]):
+            seconds += MODEL_COST_PRIORS.get(model_size, MODEL_COST_PRIORS["large"])[2]
+        return seconds
+
+_realtime_factors = None
+_realtime_factors_lock = threading.Lock()
+
+def get_realtime_factors():
+    """Return the process-wide real-time factor estimates"""
+    global _realtime_factors
+    with _realtime_factors_lock:
+        if _realtime_factors is None:
+            _realtime_factors = RealtimeFactors()
+        return _realtime_factors
+
+def choose_model(audio_seconds, budget=None, candidates=None, cache=None):
+    """Most accurate model expected to produce text within budget seconds
+
+    Only models whose routed checkpoint is resident or on disk are
+    considered; if none fits, the fastest wins.
+    """
+    budget = get_setting("latency_budget_s") if budget is None else budget
+    cache = cache or get_model_cache()
+    if not candidates:
+        policy = get_language_policy()
+        resident = {key[0] for key in cache.loaded_keys()}
+        on_disk = set(downloaded_models())
+        candidates = [m for m in MODELS
+                      if m in on_disk or policy.route(m)[0] in resident] or [DEFAULT_MODEL]
+    factors = get_realtime_factors()
+    for model_size in reversed(candidates):
+        if factors.estimate(model_size, audio_seconds, cache) <= budget:
+            return model_size
+    return candidates[0]
+
+class StreamingTranscript:
+    """Commits the stable prefix of repeated partial transcriptions
+
+    Each pass transcribes the audio after the committed point. A segment is
+    committed once two consecutive passes agree on it and it ends at least
+    `guard` seconds before the end of the audio seen so far, so only the
+    unstable tail is decoded again.
+    """
+
+    def __init__(self, sample_rate=16000, guard=1.0, max_window=20.0):
+        self.sample_rate = sample_rate
+        self.guard = guard
+        self.max_window = max_window
+        self.committed = []
+        self.committed_until = 0.0
+        self.tentative = []
+        self._previous = []
+
+    @property
+    def committed_sample(self):
+        return int(self.committed_until * self.sample_rate)
+
+    @property
+    def committed_text(self):
+        return "".join(self.committed).strip()
+
+    @property
+    def tentative_text(self):
+        return "".join(self.tentative).strip()
+
+    @staticmethod
+    def _normalize(text):
+        return " ".join(text.lower().split())
+
+    def update(self, segments, audio_end):
+        """Fold in a pass over audio[committed_sample:]; audio_end is in seconds"""
+        offset = self.committed_until
+        window = audio_end - offset
+        newly_committed = 0
+
+        for i, segment in enumerate(segments):
+            end = offset + segment["end"]
+            agreed = (i < len(self._previous)
+                      and self._normalize(self._previous[i]) == self._normalize(segment["text"]))
+            # Past max_window we commit everything but the last segment so the
+            # decoded window stays bounded even if hypotheses keep shifting
+            forced = window > self.max_window and i < len(segments) - 1
+            if not ((agreed and end <= audio_end - self.guard) or forced):
+                break
+            self.committed.append(segment["text"])
+            self.committed_until = end
+            newly_committed += 1
+
+        remaining = [segment["text"] for segment in segments[newly_committed:]]
+        self.tentative = remaining
+        self._previous = remaining
+        return self.committed_text, self.tentative_text
+
+    def finish(self, segments):
+        """Append the final decode of the unstable tail"""
+        self.committed.extend(segment["text"] for segment in segments)
+        self.tentative = []
+        self._previous = []
+        return self.committed_text
+
+class WindowedTranscript:
+    """Stitches a long recording transcribed one 30-second window at a time
+
+    Each window starts `overlap` seconds before the end of the last committed
+    segment. Segments ending within `overlap` of the window's end may be cut
+    mid-word, so they're left for the next window. Where windows overlap,
+    segments ending in already committed audio are dropped and words repeated
+    across the boundary are stripped.
+    """
+
+    # Words compared across a window boundary
+    MAX_REPEAT = 8
+    # Seconds the next window moves on at least, when little was committed
+    MIN_STEP = 1.0
+    # Timestamp jitter between windows decoding the same words
+    TIMESTAMP_SLACK = 0.2
+
+    def __init__(self, sample_rate=16000, window=30.0, overlap=1.0):
+        self.sample_rate = sample_rate
+        self.window_samples = int(window * sample_rate)
+        self.overlap = overlap
+        self.committed = []
+        self.committed_until = 0.0
+        self.next_sample = 0
+
+    @property
+    def committed_text(self):
+        return "".join(self.committed).strip()
+
+    @property
+    def prompt(self):
+        """The end of the committed text, as context for the next window"""
+        return " ".join(self.committed_text.split()[-50:]) or None
+
+    @staticmethod
+    def _words(text):
+        return [word.strip(".,!?;:\"'").lower() for word in text.split()]
+
+    def _dedupe(self, segments, offset):
+        """Drop what the previous window already committed"""
+        kept = []
+        for segment in segments:
+            # Segments straddling the commit point keep their new words;
+            # the repeated ones are stripped below
+            if offset + segment["end"] <= self.committed_until + self.TIMESTAMP_SLACK:
+                continue
+            text = segment["text"]
+            if not kept and offset + segment["start"] < self.committed_until + self.overlap:
+                tail = self._words(self.committed_text)[-self.MAX_REPEAT:]
+                words = text.split()
+                head = self._words(text)
+                for k in range(min(len(tail), len(head)), 0, -1):
+                    if tail[-k:] == head[:k]:
+                        text = " " + " ".join(words[k:]) if words[k:] else ""
+                        break
+            kept.append(dict(segment, text=text))
+        return kept
+
+    def add_window(self, segments, start, end):
+        """Fold in the segments of samples [start, end); returns the committed text"""
+        offset = start / self.sample_rate
+        limit = end / self.sample_rate - self.overlap
+        kept = self._dedupe(segments, offset)
+        stable = [segment for segment in kept if offset + segment["end"] <= limit]
+        # Segments running past the limit would otherwise stall the stitching:
+        # commit all but the last, or the only one
+        if not stable and kept:
+            stable = kept[:-1] or kept
+        for segment in stable:
+            self.committed.append(segment["text"])
+            self.committed_until = offset + segment["end"]
+        if not kept:
+            # Silence: nothing to carry over
+            self.committed_until = max(self.committed_until, limit)
+        # Restart `overlap` before the commit point, but at least MIN_STEP on
+        # and never past the commit point, so no audio is skipped
+        committed = int(self.committed_until * self.sample_rate)
+        step = int(self.MIN_STEP * self.sample_rate)
+        self.next_sample = min(committed, max(committed - int(self.overlap * self.sample_rate), start + step))
+        return self.committed_text
+
+    def finish(self, segments, start):
+        """Append the final partial window, decoded from sample start"""
+        for segment in self._dedupe(segments, start / self.sample_rate):
+            self.committed.append(segment["text"])
+        return self.committed_text
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+# Lightweight energy / zero-crossing voice activity detection. Everything is
+# vectorized over fixed-size frames so a minute of audio takes a few ms.
+
+import numpy as np
+
+class VadResult:
+    def __init__(self, audio, start, end, total, sample_rate):
+        self.audio = audio
+        self.start = start
+        self.end = end
+        self.total = total
+        self.sample_rate = sample_rate
+
+    @property
+    def has_speech(self):
+        return self.end > self.start
+
+    @property
+    def removed_seconds(self):
+        return (self.total - (self.end - self.start)) / self.sample_rate
+def frame_features(audio, sample_rate=16000, frame_ms=30):
+    """Per-frame energy in dBFS and zero-crossing rate"""
+    frame = int(sample_rate * frame_ms / 1000)
+    n_frames = len(audio) // frame
+    if n_frames == 0:
+        return np.empty(0), np.empty(0), frame
+
+    frames = np.asarray(audio[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    energy_db = 20.0 * np.log10(np.maximum(rms, 1e-10))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (frame - 1)
+    return energy_db, zcr, frame
+
+def speech_mask(audio, sample_rate=16000, frame_ms=30, min_level_db=-45.0,
+                min_dynamic_range_db=8.0, min_speech_ms=150):
+    """Boolean speech/non-speech decision for each frame"""
+    energy_db, zcr, frame = frame_features(audio, sample_rate, frame_ms)
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool), frame
+
+    floor = np.percentile(energy_db, 10)
+    peak = np.percentile(energy_db, 99)
+    # Silence, or steady background noise without speech modulation
+    if peak < min_level_db or peak - floor < min_dynamic_range_db:
+        return np.zeros(len(energy_db), dtype=bool), frame
+
+    threshold = max(min_level_db, min(floor + 10.0, peak - 20.0))
+    mask = energy_db >= threshold
+    # Quiet fricatives ("s", "f") have low energy but a high crossing rate
+    mask |= (energy_db >= threshold - 6.0) & (zcr >= 0.25)
+
+    if np.count_nonzero(mask) * frame_ms < min_speech_ms:
+        mask[:] = False
+    return mask, frame
+
+def trim_silence(audio, sample_rate=16000, padding_ms=200, **kwargs):
+    """Cut leading and trailing non-speech, keeping a little padding"""
+    mask, frame = speech_mask(audio, sample_rate, **kwargs)
+    speech = np.flatnonzero(mask)
+    if len(speech) == 0:
+        return VadResult(audio[:0], 0, 0, len(audio), sample_rate)
+
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, speech[0] * frame - padding)
+    end = min(len(audio), (speech[-1] + 1) * frame + padding)
+    return VadResult(audio[start:end], start, end, len(audio), sample_rate)
+
+def split_at_pauses(audio, sample_rate=16000, target_s=60.0, max_s=90.0, min_s=20.0,
+                    min_pause_s=0.3, **kwargs):
+    """Cut long audio into (start, end) sample ranges at pauses between words
+
+    Each cut goes in the middle of the pause nearest target_s into the chunk,
+    between min_s and max_s, preferring pauses of at least min_pause_s; with
+    no pause in that range the chunk is cut at max_s. Chunks without any
+    speech are left out.
+    """
+    mask, frame = speech_mask(audio, sample_rate, **kwargs)
+    if not mask.any():
+        return []
+    frame_s = frame / sample_rate
+    # Pause runs as [first, last) frame ranges
+    edges = np.flatnonzero(np.diff(np.concatenate(([1], mask.astype(np.int8), [1]))))
+    pauses = list(zip(edges[::2], edges[1::2]))
+
+    cuts = [0]
+    while (len(audio) - cuts[-1]) / sample_rate > max_s:
+        start = cuts[-1]
+        best = None
+        for first, last in pauses:
+            middle = (first + last) // 2 * frame
+            if not start + min_s * sample_rate <= middle <= start + max_s * sample_rate:
+                continue
+            # Real pauses over gaps between syllables, then closeness to the target length
+            length = (last - first) * frame_s
+            score = (length >= min_pause_s, -abs((middle - start) / sample_rate - target_s), length)
+            if best is None or score > best[0]:
+                best = (score, middle)
+        cuts.append(best[1] if best else start + int(max_s * sample_rate))
+    cuts.append(len(audio))
+
+    chunks = []
+    for start, end in zip(cuts[:-1], cuts[1:]):
+        if mask[start // frame:-(-end // frame)].any():
+            chunks.append((start, end))
+    return chunks